@@ -0,0 +1,143 @@
+"""Cross-worker messaging for multi-worker deployments.
+
+serve.py runs N uvicorn workers plus a small hub listening on a Unix socket, and hands the workers
+BROKER_URL=unix:///path/to.sock. Each worker connects at startup; every line a worker publishes is
+relayed to all the other workers. The hub also names a leader (the longest-connected worker),
+which runs the singleton background jobs; when the leader goes away the next oldest takes over.
+
+With no BROKER_URL, LocalBroker is used instead: one worker, publish is a no-op and the worker
+is its own leader. Messages are JSON objects, so another transport (Redis pub/sub, NATS) can stand
+in for the hub by implementing Broker.
+"""
+import asyncio
+import logging
+import os
+import uuid
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+LEADER_MESSAGE = b'{"type":"_leader"}\n'
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+class Broker:
+    """Transport interface: start() once, then publish() from any coroutine."""
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex[:8]
+        self.is_leader = False
+
+    @property
+    def shared(self) -> bool:
+        """True when other workers exist, i.e. publishing is worth serializing for."""
+        return False
+
+    async def start(self, on_message, on_leader):
+        """on_message(message) handles a peer's message; on_leader() runs when this worker becomes leader."""
+        raise NotImplementedError
+
+    def publish(self, message: dict):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class LocalBroker(Broker):
+    async def start(self, on_message, on_leader):
+        self.is_leader = True
+        await on_leader()
+
+    def publish(self, message: dict):
+        pass
+
+class UnixSocketBroker(Broker):
+    def __init__(self, path: str, reconnect_delay: float = 1.0):
+        super().__init__()
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.writer = None
+        self._reader_task = None
+
+    @property
+    def shared(self) -> bool:
+        return True
+
+    async def start(self, on_message, on_leader):
+        await self._connect()
+        self._reader_task = asyncio.create_task(self._read_forever(on_message, on_leader))
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_BYTES)
+
+    async def _read_forever(self, on_message, on_leader):
+        while True:
+            try:
+                async for line in self.reader:
+                    message = orjson.loads(line)
+                    if message.get("type") == "_leader":
+                        self.is_leader = True
+                        await on_leader()
+                    else:
+                        on_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Broker connection error: {e}")
+            # Hub gone: peers' writes are missed until it is back, so caches and ETags fall back to TTLs
+            self.writer = None
+            self.is_leader = False
+            logger.warning(f"Lost broker at {self.path}; reconnecting")
+            while self.writer is None:
+                await asyncio.sleep(self.reconnect_delay)
+                try:
+                    await self._connect()
+                except OSError:
+                    pass
+
+    def publish(self, message: dict):
+        if self.writer is not None:
+            self.writer.write(orjson.dumps(message) + b"\n")
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+def create_broker(url: str = None) -> Broker:
+    if not url:
+        return LocalBroker()
+    if url.startswith("unix://"):
+        return UnixSocketBroker(url[len("unix://"):])
+    raise ValueError(f"Unsupported BROKER_URL: {url}")
+
+async def run_hub(path: str, ready: asyncio.Event = None):
+    """Relay every line from one connection to all others; the oldest connection is the leader."""
+    clients = []
+
+    async def handle(reader, writer):
+        clients.append(writer)
+        if clients[0] is writer:
+            writer.write(LEADER_MESSAGE)
+        try:
+            async for line in reader:
+                for client in clients:
+                    if client is not writer:
+                        client.write(line)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.warning(f"Dropping broker client: {e}")
+        finally:
+            was_leader = clients[0] is writer
+            clients.remove(writer)
+            writer.close()
+            if was_leader and clients:
+                clients[0].write(LEADER_MESSAGE)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(handle, path, limit=MAX_MESSAGE_BYTES)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
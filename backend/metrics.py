@@ -0,0 +1,241 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+No client library: counters, gauges and histograms keep their samples in dicts keyed by label
+values, and REGISTRY.render() produces the body for GET /api/metrics. Everything runs on the
+event loop, so no locking is needed.
+
+Four sources feed it:
+
+- MetricsMiddleware: request counts, latency, in-flight requests and payload sizes per route
+  template (e.g. /api/tasks/{task_id}) and status code.
+- instrument_storage(): duration and error counts of every Storage operation, labelled by
+  backend and operation, so each storage call made by a route is covered.
+- MongoMetrics: duration, error and document counts of every Motor call, labelled by the
+  collection and driver operation that actually ran. server.py installs it through the
+  ProfiledDatabase wrapper from profiling.py whenever the Mongo backend is in use.
+- The task archiver in server.py: tasks moved and time taken per run.
+"""
+from bisect import bisect_left
+import inspect
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in self.values.items()]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self.values = {}
+
+    def observe(self, value: float, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = []
+        for labels, (bucket_counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), bucket_counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, including streaming the body.",
+    ("method", "route", "status")))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."))
+HTTP_REQUEST_SIZE = REGISTRY.register(Histogram(
+    "http_request_size_bytes", "HTTP request body size.", ("method", "route"), SIZE_BUCKETS))
+HTTP_RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size.", ("method", "route"), SIZE_BUCKETS))
+STORAGE_OPERATION_DURATION = REGISTRY.register(Histogram(
+    "storage_operation_duration_seconds", "Time spent in a storage operation.", ("backend", "operation")))
+STORAGE_OPERATION_ERRORS = REGISTRY.register(Counter(
+    "storage_operation_errors_total", "Storage operations that raised.", ("backend", "operation")))
+MONGO_OPERATION_DURATION = REGISTRY.register(Histogram(
+    "mongo_operation_duration_seconds", "Time spent in a MongoDB driver call.", ("collection", "operation")))
+MONGO_OPERATION_ERRORS = REGISTRY.register(Counter(
+    "mongo_operation_errors_total", "MongoDB driver calls that raised.", ("collection", "operation")))
+MONGO_DOCUMENTS = REGISTRY.register(Counter(
+    "mongo_documents_total", "Documents returned or written by MongoDB driver calls.", ("collection", "operation")))
+
+ARCHIVED_TASKS = REGISTRY.register(Counter(
+    "tasks_archived_total", "Done tasks moved to the archive."))
+ARCHIVE_RUN_DURATION = REGISTRY.register(Histogram(
+    "archive_run_duration_seconds", "Time taken by a task archive run.",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)))
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses (exports, SSE) pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+        self.route_paths = None
+
+    def route_label(self, scope) -> str:
+        # The router records the matched endpoint in the scope; map it back to its path template
+        # so ids never end up in label values
+        if self.route_paths is None:
+            self.route_paths = {getattr(route, "endpoint", None): route.path for route in scope["app"].routes}
+        return self.route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_wrapper():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            method = scope["method"]
+            route = self.route_label(scope)
+            HTTP_REQUESTS.inc(method, route, str(status))
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route, str(status))
+            HTTP_REQUEST_SIZE.observe(request_size, method, route)
+            HTTP_RESPONSE_SIZE.observe(response_size, method, route)
+
+class MongoMetrics:
+    """Recorder for profiling.ProfiledDatabase that feeds the mongo_* metrics."""
+
+    def record(self, collection: str, operation: str, spec, duration: float, returned: int, explain=None,
+               failed: bool = False):
+        MONGO_OPERATION_DURATION.observe(duration, collection, operation)
+        if failed:
+            MONGO_OPERATION_ERRORS.inc(collection, operation)
+        if returned:
+            MONGO_DOCUMENTS.inc(collection, operation, amount=returned)
+
+def _timed_coroutine(method, labels):
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            STORAGE_OPERATION_ERRORS.inc(*labels)
+            raise
+        finally:
+            STORAGE_OPERATION_DURATION.observe(time.perf_counter() - started, *labels)
+    return timed
+
+def _timed_iterator(method, labels):
+    async def timed(*args, **kwargs):
+        # Only time spent fetching counts, not the time the consumer holds each item
+        elapsed = 0.0
+        iterator = method(*args, **kwargs).__aiter__()
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception:
+                    STORAGE_OPERATION_ERRORS.inc(*labels)
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield item
+        finally:
+            STORAGE_OPERATION_DURATION.observe(elapsed, *labels)
+            await iterator.aclose()
+    return timed
+
+def instrument_storage(storage, backend: str):
+    """Wrap every public async method of `storage` in place and return it."""
+    for name in dir(storage):
+        if name.startswith("_"):
+            continue
+        method = getattr(storage, name)
+        if inspect.isasyncgenfunction(method):
+            setattr(storage, name, _timed_iterator(method, (backend, name)))
+        elif inspect.iscoroutinefunction(method):
+            setattr(storage, name, _timed_coroutine(method, (backend, name)))
+    return storage
@@ -0,0 +1,332 @@
+"""Opt-in, request-scoped profiling of MongoDB operations (QUERY_PROFILING=true).
+
+ProfiledDatabase stands in for MongoStorage.db and hands out ProfiledCollection wrappers, so every
+Motor call a storage method makes is timed without touching storage.py. Timings go to a recorder:
+the QueryProfiler here, the per-collection Mongo metrics in metrics.py, or both via Recorders. For each operation the
+profile keeps the collection, operation, filter shape (values replaced by "?", so shapes group
+across requests), duration and documents returned. A sample of reads is explained in the
+background to record which index served them, or COLLSCAN.
+
+ProfilingMiddleware opens a RequestProfile per request in a context variable and tags the response
+with X-Query-Profile (the profile id, for GET /api/debug/queries/{id}) and a Server-Timing entry
+summing database time. Operations slower than the threshold are logged with their route whether a
+profile is open or not. Operations started by background jobs after a response was sent (project
+deletion, archiving) are logged but not added to the finished profile.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+logger = logging.getLogger(__name__)
+
+current_profile = contextvars.ContextVar("query_profile", default=None)
+
+# Operations whose first argument is a filter; explained as a find with that filter
+FILTERED_OPERATIONS = ("find_one", "count_documents", "distinct", "find_one_and_update", "find_one_and_delete",
+                   "find_one_and_replace", "update_one", "update_many", "delete_one", "delete_many", "replace_one")
+UNFILTERED_OPERATIONS = ("insert_one", "insert_many", "bulk_write", "estimated_document_count")
+
+def filter_shape(value):
+    """The structure of a filter or pipeline with every literal replaced by "?"."""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # An $in list is one shape however long it is; pipelines and $or branches keep every entry
+        if value and all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ["?"]
+        return [filter_shape(item) for item in value]
+    return "?"
+
+def indexes_used(explain: dict) -> list:
+    """Index names (or COLLSCAN) anywhere in an explain plan."""
+    found = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get("stage") == "COLLSCAN":
+                found.add("COLLSCAN")
+            if isinstance(node.get("indexName"), str):
+                found.add(node["indexName"])
+            for key, child in node.items():
+                # Rejected plans would name indexes that were never used
+                if key != "rejectedPlans":
+                    walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+
+    walk(explain)
+    return sorted(found)
+
+def _returned(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int):
+        return result
+    for attribute in ("deleted_count", "modified_count"):
+        if hasattr(result, attribute):
+            return getattr(result, attribute)
+    if hasattr(result, "inserted_ids"):
+        return len(result.inserted_ids)
+    return 1
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, route=None):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self._route = route
+        self.started_at = datetime.utcnow()
+        self.status = None
+        self.duration_ms = None
+        self.operations = []
+        self.closed = False
+
+    @property
+    def route(self) -> str:
+        return self._route() if callable(self._route) else (self._route or self.path)
+
+    def db_time_ms(self) -> float:
+        return round(sum(operation["duration_ms"] for operation in self.operations), 2)
+
+    def summary(self) -> dict:
+        return {"id": self.id, "method": self.method, "path": self.path, "route": self.route,
+                "status": self.status, "started_at": self.started_at, "duration_ms": self.duration_ms,
+                "operations": len(self.operations), "db_time_ms": self.db_time_ms()}
+
+    def as_dict(self) -> dict:
+        return {**self.summary(), "operations": self.operations}
+
+class QueryProfiler:
+    """Collects operations into the current RequestProfile and keeps the last `max_profiles`."""
+
+    def __init__(self, slow_query_ms: float = 100, explain_sample_rate: float = 0.1, max_profiles: int = 200):
+        self.slow_query_ms = slow_query_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.max_profiles = max_profiles
+        self.profiles = OrderedDict()
+        self._explains = set()
+
+    def record(self, collection: str, operation: str, spec, duration: float, returned: int, explain=None,
+               failed: bool = False):
+        profile = current_profile.get()
+        shape = filter_shape(spec) if spec is not None else None
+        entry = {"collection": collection, "operation": operation, "filter": shape,
+                 "duration_ms": round(duration * 1000, 2), "documents": returned, "index": None, "failed": failed}
+        if profile is not None and not profile.closed:
+            profile.operations.append(entry)
+        if entry["duration_ms"] >= self.slow_query_ms:
+            route = f"{profile.method} {profile.route}" if profile is not None else "background"
+            logger.warning(f"Slow query ({entry['duration_ms']:.0f}ms, {returned} docs) on {collection}.{operation} "
+                           f"from {route}: {shape}")
+        if explain is not None and random.random() < self.explain_sample_rate:
+            task = asyncio.create_task(self._explain(entry, explain))
+            self._explains.add(task)
+            task.add_done_callback(self._explains.discard)
+
+    async def _explain(self, entry: dict, explain):
+        try:
+            entry["index"] = ", ".join(indexes_used(await explain())) or None
+        except Exception as e:
+            entry["index"] = f"explain failed: {e}"
+
+    def open(self, method: str, path: str, route=None) -> RequestProfile:
+        profile = RequestProfile(method, path, route)
+        self.profiles[profile.id] = profile
+        while len(self.profiles) > self.max_profiles:
+            self.profiles.popitem(last=False)
+        return profile
+
+    def recent(self, limit: int = 50) -> list:
+        return [profile.summary() for profile in reversed(self.profiles.values())][:limit]
+
+    def get(self, profile_id: str):
+        profile = self.profiles.get(profile_id)
+        return profile.as_dict() if profile is not None else None
+
+class Recorders:
+    """Hands each timed operation to several recorders."""
+
+    def __init__(self, *recorders):
+        self.recorders = recorders
+
+    def record(self, *args, **kwargs):
+        for recorder in self.recorders:
+            recorder.record(*args, **kwargs)
+
+class ProfiledCursor:
+    """Wraps a Motor cursor; chained modifiers are recorded for explain, fetches are timed."""
+
+    def __init__(self, cursor, recorder, collection, operation: str, spec):
+        self.cursor = cursor
+        self.recorder = recorder
+        self.collection = collection
+        self.operation = operation
+        self.spec = spec  # filter for find, pipeline for aggregate
+        self.sort_spec = None
+        self.limit_value = 0
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        self.sort_spec = args[0] if len(args) == 1 else [args] if args else None
+        return self
+
+    def limit(self, limit: int):
+        self.cursor = self.cursor.limit(limit)
+        self.limit_value = limit
+        return self
+
+    def skip(self, skip: int):
+        self.cursor = self.cursor.skip(skip)
+        return self
+
+    def batch_size(self, batch_size: int):
+        self.cursor = self.cursor.batch_size(batch_size)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def _record(self, duration: float, returned: int, failed: bool = False):
+        self.recorder.record(self.collection.name, self.operation, self.spec, duration, returned,
+                             explain=self._explain, failed=failed)
+
+    async def _explain(self):
+        if self.operation == "aggregate":
+            return await self.collection.database.command("aggregate", self.collection.name, pipeline=self.spec,
+                                                          explain=True)
+        cursor = self.collection.find(self.spec)
+        if self.sort_spec:
+            cursor = cursor.sort(self.sort_spec)
+        return await cursor.limit(self.limit_value).explain()
+
+    async def to_list(self, length=None):
+        started = time.perf_counter()
+        try:
+            docs = await self.cursor.to_list(length)
+        except Exception:
+            self._record(time.perf_counter() - started, 0, failed=True)
+            raise
+        self._record(time.perf_counter() - started, len(docs))
+        return docs
+
+    async def __aiter__(self):
+        # Time spent fetching only, not the time the consumer spends on each document
+        elapsed, returned, failed = 0.0, 0, False
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    doc = await self.cursor.next()
+                except StopAsyncIteration:
+                    return
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - started
+                returned += 1
+                yield doc
+        finally:
+            self._record(elapsed, returned, failed)
+
+class ProfiledCollection:
+    def __init__(self, collection, recorder):
+        self.collection = collection
+        self.recorder = recorder
+
+    def find(self, *args, **kwargs):
+        spec = args[0] if args else kwargs.get("filter", {})
+        return ProfiledCursor(self.collection.find(*args, **kwargs), self.recorder, self.collection, "find", spec)
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        cursor = self.collection.aggregate(pipeline, *args, **kwargs)
+        return ProfiledCursor(cursor, self.recorder, self.collection, "aggregate", pipeline)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.collection, name)
+        if name not in FILTERED_OPERATIONS and name not in UNFILTERED_OPERATIONS:
+            return attribute
+
+        async def timed(*args, **kwargs):
+            filter_position = 1 if name == "distinct" else 0
+            spec = args[filter_position] if len(args) > filter_position else kwargs.get("filter", {})
+            started = time.perf_counter()
+            result, failed = None, True
+            try:
+                result = await attribute(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                # Failed operations are recorded too; a timeout is the slowest query of all
+                duration = time.perf_counter() - started
+                if name in UNFILTERED_OPERATIONS:
+                    # Inserted documents and bulk operation lists are not filters
+                    self.recorder.record(self.collection.name, name, None, duration, _returned(result), failed=failed)
+                else:
+                    explain = lambda: self.collection.find(spec).limit(1).explain()
+                    self.recorder.record(self.collection.name, name, spec, duration, _returned(result), explain,
+                                         failed=failed)
+        return timed
+
+class ProfiledDatabase:
+    """Drop-in for an AsyncIOMotorDatabase whose collections report every operation to `recorder`."""
+
+    def __init__(self, db, recorder):
+        self.db = db
+        self.recorder = recorder
+
+    def __getitem__(self, name):
+        return ProfiledCollection(self.db[name], self.recorder)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.db, name)
+        if isinstance(attribute, AsyncIOMotorCollection):
+            return ProfiledCollection(attribute, self.recorder)
+        return attribute
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware opening a RequestProfile for each HTTP request."""
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+        self.route_paths = None
+
+    def route_label(self, scope) -> str:
+        if self.route_paths is None:
+            self.route_paths = {getattr(route, "endpoint", None): route.path for route in scope["app"].routes}
+        return self.route_paths.get(scope.get("endpoint"), scope["path"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = self.profiler.open(scope["method"], scope["path"], route=lambda: self.route_label(scope))
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                summary = f'db;dur={profile.db_time_ms()};desc="{len(profile.operations)} queries"'
+                message["headers"] = [*message.get("headers", []),
+                                      (b"x-query-profile", profile.id.encode()),
+                                      (b"server-timing", summary.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            profile.closed = True
@@ -0,0 +1,98 @@
+"""Fractional rank keys for ordering tasks inside a Kanban column.
+
+A rank is a string of base-62 digits read as a fraction (0.d1d2d3...), so plain string comparison
+orders ranks, in Mongo and in Python alike. There is always room between two ranks: moving a task
+takes one key between its new neighbours and rewrites only that task. Keys never end in "0", which
+keeps every gap open.
+
+New tasks get a key derived from their creation time, decreasing as time goes on, so unranked
+columns read newest first (the order the board used before ranks existed) and creating a task
+needs no read of its column. Repeated moves into the same gap lengthen keys by about one digit per
+six moves; rebalance_ranks() spaces a column out again.
+"""
+import random
+from datetime import datetime, timezone
+from typing import Optional
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+DIGIT_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+# Eight digits of milliseconds covers roughly 6,900 years from the Unix epoch
+TIME_DIGITS = 8
+SALT_DIGITS = 4
+
+def _encode(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits))
+
+def _decode(rank: str, width: int) -> int:
+    value = 0
+    for digit in rank[:width].ljust(width, "0"):
+        value = value * BASE + DIGIT_VALUES[digit]
+    return value
+
+def _trim(rank: str) -> str:
+    # Trailing zeros do not change a fraction's value, and a key ending in "0" has no key just below it
+    return rank.rstrip("0") or DIGITS[BASE // 2]
+
+def initial_rank(created_at: datetime, salt: Optional[str] = None) -> str:
+    """Rank for a task that has never been moved; later tasks sort first.
+
+    `salt` (e.g. the task id) makes the key deterministic; by default it is random, so tasks
+    created in the same millisecond still get distinct keys.
+    """
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    millis = int(created_at.timestamp() * 1000)
+    time_part = _encode(BASE ** TIME_DIGITS - 1 - millis, TIME_DIGITS)
+    if salt is None:
+        salt_part = "".join(random.choice(DIGITS) for _ in range(SALT_DIGITS))
+    else:
+        salt_part = _encode(int.from_bytes(salt.encode(), "big") % BASE ** SALT_DIGITS, SALT_DIGITS)
+    return _trim(time_part + salt_part)
+
+def new_rank() -> str:
+    return initial_rank(datetime.utcnow())
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """A key strictly between `before` and `after`; None means the start or end of the column."""
+    before = before or ""
+    if after is not None and not before < after:
+        raise ValueError(f"Rank {before!r} does not sort before {after!r}")
+    return _midpoint(before, after)
+
+def _midpoint(low: str, high: Optional[str]) -> str:
+    if high is not None:
+        # Keep the shared prefix (treating missing digits of `low` as zeros) and split what follows
+        shared = 0
+        while shared < len(high) and (low[shared] if shared < len(low) else "0") == high[shared]:
+            shared += 1
+        if shared:
+            return high[:shared] + _midpoint(low[shared:], high[shared:])
+    low_digit = DIGIT_VALUES[low[0]] if low else 0
+    high_digit = DIGIT_VALUES[high[0]] if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # Adjacent first digits: either `high` truncated already fits, or descend into `low`'s tail
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+def rebalance_ranks(count: int, below: Optional[str] = None, gap_digits: int = 2) -> list:
+    """`count` short, evenly spaced ascending keys, all sorting after `below`.
+
+    Each gap leaves at least BASE ** gap_digits free keys, so a column takes many moves before
+    its keys grow again. Pass the current new_rank() as `below` so tasks created afterwards still
+    sort ahead of the rebalanced ones.
+    """
+    below = below or ""
+    width = max(len(below), 1)
+    while True:
+        low = _decode(below, width)
+        step = (BASE ** width - low) // (count + 1)
+        if step >= BASE ** gap_digits:
+            return [_trim(_encode(low + step * (i + 1), width)) for i in range(count)]
+        width += 1
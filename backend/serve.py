@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Run the API with one or more uvicorn worker processes.
+
+With --workers > 1 this also starts the hub from cluster.py on a Unix socket and points every
+worker at it (BROKER_URL), so ETag versions, document caches, dashboard stats and the SSE feed
+stay consistent across workers, and exactly one worker runs the startup singleton jobs.
+
+    python serve.py --port 8000 --workers 4
+
+--workers defaults to $WEB_CONCURRENCY, else 1. Multiple workers need STORAGE_BACKEND=mongo: the
+in-memory backend would give each worker its own private data.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+import uvicorn
+from dotenv import load_dotenv
+
+from cluster import run_hub
+
+
+def start_hub() -> str:
+    path = os.path.join(tempfile.mkdtemp(prefix="todo-api-"), "broker.sock")
+    ready = threading.Event()
+
+    async def hub():
+        started = asyncio.Event()
+        serving = asyncio.create_task(run_hub(path, started))
+        await started.wait()
+        ready.set()
+        await serving
+
+    threading.Thread(target=asyncio.run, args=(hub(),), name="broker-hub", daemon=True).start()
+    if not ready.wait(10):
+        raise SystemExit(f"Broker hub did not start on {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / ".env")
+    if args.workers > 1:
+        if os.environ.get("STORAGE_BACKEND", "mongo") == "memory":
+            raise SystemExit("STORAGE_BACKEND=memory keeps data per process; use mongo with --workers > 1")
+        os.environ["BROKER_URL"] = f"unix://{start_hub()}"
+        os.environ["CLUSTER_EPOCH"] = uuid.uuid4().hex[:8]
+
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,77 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request, Response
 from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.middleware.gzip import GZipMiddleware
+from pymongo.errors import OperationFailure, PyMongoError
+from storage import MongoStorage, create_storage, stored_form
+from metrics import ARCHIVE_RUN_DURATION, ARCHIVED_TASKS, REGISTRY, MetricsMiddleware, MongoMetrics, instrument_storage
+from cluster import create_broker
+from profiling import ProfiledDatabase, ProfilingMiddleware, QueryProfiler, Recorders
+from ranking import initial_rank, new_rank, rank_between, rebalance_ranks
 import os
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Union
 import uuid
-from datetime import datetime
+import json
+import orjson
+import base64
+import hashlib
+from datetime import datetime, timedelta, timezone
+import time
 from enum import Enum
+from collections import Counter, OrderedDict, defaultdict
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Storage backend: "mongo" (default) or "memory" (in-process, no external services)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+
+# Motor connection pool; the client connects lazily, and lifespan warms it before traffic arrives
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')),
+    "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+    "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    "socketTimeoutMS": int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '30000')),
+}
+
+storage = instrument_storage(create_storage(
+    STORAGE_BACKEND,
+    mongo_url=os.environ.get('MONGO_URL'),
+    db_name=os.environ.get('DB_NAME'),
+    **MONGO_CLIENT_OPTIONS,
+), STORAGE_BACKEND)
+
+# Query profiling: an opt-in per-request record of every Mongo operation, plus a slow-query log; see profiling.py
+QUERY_PROFILING = os.environ.get('QUERY_PROFILING', 'false').lower() == 'true'
+query_profiler = QueryProfiler(
+    slow_query_ms=float(os.environ.get('SLOW_QUERY_MS', '100')),
+    explain_sample_rate=float(os.environ.get('QUERY_PROFILE_EXPLAIN_SAMPLE', '0.1')),
+)
+if isinstance(storage, MongoStorage):
+    # Per-collection driver metrics always; the request profiler only when it is switched on
+    storage.db = ProfiledDatabase(
+        storage.db, Recorders(MongoMetrics(), query_profiler) if QUERY_PROFILING else MongoMetrics())
+
+# Peer workers, when launched through serve.py with --workers > 1; see cluster.py
+cluster = create_broker(os.environ.get('BROKER_URL'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -36,6 +87,10 @@ class TaskPriority(str, Enum):
     MEDIUM = "medium"
     HIGH = "high"
 
+class TaskSort(str, Enum):
+    CREATED_AT = "created_at"
+    RANK = "rank"
+
 # Models
 class Task(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -45,6 +100,8 @@ class Task(BaseModel):
     priority: TaskPriority = TaskPriority.MEDIUM
     due_date: Optional[datetime] = None
     project_id: Optional[str] = None
+    # Position within its Kanban column; see ranking.py
+    rank: str = Field(default_factory=new_rank)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -62,6 +119,11 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
 
+class TaskMove(BaseModel):
+    status: TaskStatus
+    prev_id: Optional[str] = None  # task that ends up directly above the moved one
+    next_id: Optional[str] = None  # task that ends up directly below it
+
 class Project(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -80,6 +142,104 @@ class ProjectUpdate(BaseModel):
     description: Optional[str] = None
     color: Optional[str] = None
 
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+class ProjectPage(BaseModel):
+    items: List[Project]
+    next_cursor: Optional[str] = None
+
+class ProjectTaskCounts(BaseModel):
+    todo: int = 0
+    in_progress: int = 0
+    done: int = 0
+    high_priority_open: int = 0
+
+class ProjectSummary(BaseModel):
+    id: str
+    name: str
+    color: str
+    task_counts: ProjectTaskCounts
+
+class TaskSearchResult(Task):
+    score: float
+
+class TaskSearchPage(BaseModel):
+    items: List[TaskSearchResult]
+    next_cursor: Optional[str] = None
+
+class BulkOperationType(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+BULK_MAX_OPERATIONS = 1000
+
+class BulkTaskOperation(BaseModel):
+    op: BulkOperationType
+    id: Optional[str] = None  # required for update/delete
+    data: Optional[dict] = None  # TaskCreate for create, TaskUpdate for update
+
+class BulkTaskRequest(BaseModel):
+    operations: List[BulkTaskOperation] = Field(..., max_length=BULK_MAX_OPERATIONS)
+
+class BulkTaskResult(BaseModel):
+    index: int
+    op: BulkOperationType
+    id: Optional[str] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BulkTaskResponse(BaseModel):
+    inserted: int
+    updated: int
+    deleted: int
+    results: List[BulkTaskResult]
+
+BATCH_GET_MAX_IDS = int(os.environ.get('BATCH_GET_MAX_IDS', '500'))
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=BATCH_GET_MAX_IDS)
+
+class TaskBatchGetRequest(BatchGetRequest):
+    embed_project: bool = False  # attach each task's project to its result
+
+class TaskBatchGetResult(BaseModel):
+    id: str
+    found: bool
+    task: Optional[Task] = None
+    project: Optional[Project] = None  # only with embed_project, and only if the project exists
+
+class ProjectBatchGetResult(BaseModel):
+    id: str
+    found: bool
+    project: Optional[Project] = None
+
+class TaskBatchGetResponse(BaseModel):
+    results: List[TaskBatchGetResult]
+
+class ProjectBatchGetResponse(BaseModel):
+    results: List[ProjectBatchGetResult]
+
+class ProjectDeletionStatus(BaseModel):
+    project_id: str
+    state: str  # deleting | deleted | failed
+    deleted_tasks: int = 0
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class ArchiveRun(BaseModel):
+    id: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    done_before: datetime
+    archived: int = 0
+    batches: int = 0
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
 class TaskStats(BaseModel):
     total_tasks: int
     completed_tasks: int
@@ -90,183 +250,1576 @@ class ProjectStats(BaseModel):
     total_projects: int
     active_projects: int
 
+# Fast read path: documents are written through the pydantic models, so reads skip
+# re-validation and go straight from storage to JSON bytes (response_model is docs only)
+def json_response(content, etag: Optional[str] = None) -> ORJSONResponse:
+    return ORJSONResponse(content, headers={"ETag": etag} if etag else None)
+
+# Keyset pagination on (created_at, id), newest first
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+def encode_cursor(doc: dict, key: str = "created_at") -> str:
+    raw = json.dumps([doc[key].isoformat(), doc["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+# Due-date listings run oldest due first on (due_date, id); decode_cursor reads these too
+def encode_due_cursor(doc: dict) -> str:
+    return encode_cursor(doc, "due_date")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Turn an opaque cursor back into the (created_at, id) key the next page starts after."""
+    try:
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Search results are ranked by relevance, so their cursors carry the score as well
+def encode_search_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["score"], doc["created_at"].isoformat(), doc["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_search_cursor(cursor: str) -> tuple:
+    try:
+        score, created_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), datetime.fromisoformat(created_at), doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Board order (get_project_tasks?sort=rank) pages on (status, rank, id)
+def encode_rank_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["status"], doc["rank"], doc["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_rank_cursor(cursor: str) -> tuple:
+    try:
+        status, rank, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(status), str(rank), str(doc_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(list_docs, limit: int, after: Optional[tuple] = None, encode=encode_cursor, **filters):
+    """Return up to `limit` documents plus the cursor for the next page (None on the last page)."""
+    docs = await list_docs(limit=limit + 1, after=after, **filters)
+    next_cursor = encode(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+# Sparse fieldsets: ?fields=title,status is pushed down as a storage projection.
+# id and created_at always come back, since clients key on id and cursors need created_at.
+def parse_fields(fields: Optional[str], model) -> Optional[tuple]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", "created_at", *requested]))
+
+# NDJSON export
+EXPORT_BATCH_SIZE = 500
+
+async def stream_ndjson(docs, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield one chunk of newline-delimited JSON per batch, so only a batch is held in memory."""
+    lines = []
+    async for doc in docs:
+        lines.append(orjson.dumps(doc))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+# Dashboard stats
+def format_stats(total_tasks: int, completed_tasks: int, high_priority_tasks: int, total_projects: int, active_projects: int) -> dict:
+    return {
+        "tasks": {
+            "total": total_tasks,
+            "completed": completed_tasks,
+            "pending": total_tasks - completed_tasks,
+            "high_priority": high_priority_tasks
+        },
+        "projects": {
+            "total": total_projects,
+            "active": active_projects
+        }
+    }
+
+class StatsCache:
+    """In-memory dashboard counters, kept current by the mutation routes and
+    periodically reconciled against the database."""
+
+    def __init__(self, enabled: bool = False, reconcile_interval: float = 60):
+        self.enabled = enabled
+        self.reconcile_interval = reconcile_interval
+        self.ready = False
+        self.total_tasks = 0
+        self.completed_tasks = 0
+        self.high_priority_tasks = 0
+        self.total_projects = 0
+        self.project_task_counts = Counter()
+
+    def _apply_task(self, task: dict, sign: int):
+        done = task.get("status") == TaskStatus.DONE
+        self.total_tasks += sign
+        self.completed_tasks += sign * done
+        self.high_priority_tasks += sign * (task.get("priority") == TaskPriority.HIGH and not done)
+        project_id = task.get("project_id")
+        if project_id is not None:
+            self.project_task_counts[project_id] += sign
+            if self.project_task_counts[project_id] <= 0:
+                del self.project_task_counts[project_id]
+
+    def task_created(self, task: dict):
+        if self.enabled:
+            self._apply_task(task, 1)
+
+    def task_updated(self, old_task: dict, new_task: dict):
+        if self.enabled:
+            self._apply_task(old_task, -1)
+            self._apply_task(new_task, 1)
+
+    def task_deleted(self, task: dict):
+        if self.enabled:
+            self._apply_task(task, -1)
+
+    def project_created(self):
+        if self.enabled:
+            self.total_projects += 1
+
+    def snapshot(self) -> dict:
+        return format_stats(self.total_tasks, self.completed_tasks, self.high_priority_tasks,
+                            self.total_projects, len(self.project_task_counts))
+
+    async def reconcile(self):
+        counts = await storage.dashboard_counts(project_deletions.deleting, per_project=True)
+        self.total_tasks = counts["total"]
+        self.completed_tasks = counts["completed"]
+        self.high_priority_tasks = counts["high_priority"]
+        self.total_projects = counts["total_projects"]
+        self.project_task_counts = Counter(counts["active_projects"])
+        self.ready = True
+
+    async def run_reconciler(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Stats reconcile failed: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+stats_cache = StatsCache(
+    enabled=os.environ.get('STATS_CACHE', 'false').lower() == 'true',
+    reconcile_interval=float(os.environ.get('STATS_RECONCILE_INTERVAL', '60')),
+)
+
+# Change feed
+EVENTS_KEEPALIVE_SECONDS = 15
+CHANGE_STREAM_RETRY_SECONDS = 1
+CHANGE_STREAM_MAX_RETRY_SECONDS = 30
+# InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost: the resume point is gone
+CHANGE_STREAM_UNRESUMABLE = {260, 280, 286}
+CHANGE_STREAM_ACTIONS = {"insert": "created", "update": "updated", "replace": "updated", "delete": "deleted"}
+
+def _public_doc(doc: dict) -> dict:
+    return {k: v for k, v in doc.items() if k != "_id"}
+
+def task_stats_delta(old_task: Optional[dict], new_task: Optional[dict]) -> Optional[dict]:
+    """Change in the dashboard task counters caused by replacing old_task with new_task.
+
+    None when a project gains or loses a task: whether that changes the active-project count
+    depends on the project's other tasks, so clients refetch the stats instead.
+    """
+    if (old_task or {}).get("project_id") != (new_task or {}).get("project_id"):
+        return None
+
+    def counts(task):
+        if not task:
+            return (0, 0, 0, 0)
+        done = task.get("status") == TaskStatus.DONE
+        return (1, int(done), int(not done), int(task.get("priority") == TaskPriority.HIGH and not done))
+    deltas = [after - before for before, after in zip(counts(old_task), counts(new_task))]
+    return {"tasks": dict(zip(("total", "completed", "pending", "high_priority"), deltas))}
+
+def task_event(old_task: Optional[dict], new_task: Optional[dict]) -> dict:
+    action = "created" if old_task is None else "deleted" if new_task is None else "updated"
+    return {
+        "type": f"task.{action}",
+        "data": _public_doc(new_task if new_task is not None else old_task),
+        "stats_delta": task_stats_delta(old_task, new_task),
+    }
+
+def archived_event(tasks: list) -> dict:
+    # Archived tasks are all done, so they only ever left the total and completed counters, and the
+    # active-project count when they were a project's last tasks
+    delta = {"tasks": {"total": -len(tasks), "completed": -len(tasks), "pending": 0, "high_priority": 0}}
+    return {
+        "type": "tasks.archived",
+        "data": {"ids": [task["id"] for task in tasks]},
+        "stats_delta": None if any(task.get("project_id") for task in tasks) else delta,
+    }
+
+def project_event(action: str, project: dict) -> dict:
+    return {
+        "type": f"project.{action}",
+        "data": _public_doc(project),
+        "stats_delta": {"projects": {"total": {"created": 1, "deleted": -1}.get(action, 0)}},
+    }
+
+class EventBroker:
+    """In-process pub/sub fanout feeding GET /api/events.
+
+    With source="changestream" the routes stop publishing and the Mongo change-stream
+    watchers started at startup become the only producer.
+    """
+
+    def __init__(self, source: str = "inprocess", queue_size: int = 1000):
+        self.source = source
+        self.queue_size = queue_size
+        self.subscribers = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and tell it to refetch instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    def resync(self, kind: str):
+        """Drop this worker's cached documents of `kind` and tell clients to refetch."""
+        (task_cache if kind == "task" else project_cache).invalidate_where(lambda doc: True)
+        self.publish({"type": "resync"})
+
+    async def watch(self, collection, kind: str, pre_images: bool = False):
+        """Publish changes from a Mongo change stream (needs a replica set).
+
+        Pre-images are requested only when `pre_images` is set (MongoDB 6.0+ with them enabled on
+        the collection); without one a delete carries only the _id, so it triggers a resync. The
+        stream is reopened after errors, resuming after the last change seen; when the server can
+        no longer resume from there, it starts afresh and clients resync.
+        """
+        options = {"full_document": "updateLookup"}
+        if pre_images:
+            options["full_document_before_change"] = "whenAvailable"
+        resume_token = None
+        delay = CHANGE_STREAM_RETRY_SECONDS
+        while True:
+            try:
+                async with collection.watch(resume_after=resume_token, **options) as stream:
+                    delay = CHANGE_STREAM_RETRY_SECONDS
+                    async for change in stream:
+                        self.publish_change(change, kind)
+                        resume_token = stream.resume_token
+            except OperationFailure as e:
+                if resume_token is not None and e.code in CHANGE_STREAM_UNRESUMABLE:
+                    logger.warning(f"Change stream on {collection.name} cannot resume ({e}); restarting and resyncing")
+                    resume_token = None
+                    self.resync(kind)
+                    continue
+                logger.error(f"Change stream on {collection.name} failed: {e}; retrying in {delay:.0f}s")
+            except PyMongoError as e:
+                logger.error(f"Change stream on {collection.name} interrupted: {e}; retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHANGE_STREAM_MAX_RETRY_SECONDS)
+
+    def publish_change(self, change: dict, kind: str):
+        action = CHANGE_STREAM_ACTIONS.get(change["operationType"])
+        if action is None:
+            return
+        old_doc = change.get("fullDocumentBeforeChange")
+        new_doc = change.get("fullDocument") if action != "deleted" else None
+        if old_doc is None and new_doc is None:
+            self.resync(kind)
+            return
+        # Keeps this worker's document cache coherent with writes made by its peers
+        cache = task_cache if kind == "task" else project_cache
+        cache.invalidate((new_doc or old_doc)["id"])
+        if kind == "project":
+            event = project_event(action, new_doc or old_doc)
+        elif action == "updated" and old_doc is None:
+            # No pre-image, so the stats delta is unknown; clients refetch stats
+            event = {"type": "task.updated", "data": _public_doc(new_doc), "stats_delta": None}
+        else:
+            event = task_event(old_doc if action != "created" else None, new_doc)
+        self.publish(event)
+
+event_broker = EventBroker(
+    source=os.environ.get('EVENTS_SOURCE', 'inprocess'),
+    queue_size=int(os.environ.get('EVENTS_QUEUE_SIZE', '1000')),
+)
+
+# Conditional GET
+class CollectionVersions:
+    """Per-collection write counters; list ETags are derived from these so a 304 needs no query.
+
+    Each worker counts its own writes and merges the counts its peers broadcast (a version
+    vector), so all workers hand out the same ETag once they have seen the same writes.
+    """
+
+    def __init__(self, worker_id: str = None, epoch: str = None):
+        self.worker_id = worker_id or uuid.uuid4().hex[:8]
+        # Fresh epoch per deployment so ETags from a previous run never match; serve.py shares one across workers
+        self.epoch = epoch or uuid.uuid4().hex[:8]
+        self.versions = defaultdict(Counter)  # collection -> {worker id: writes}
+
+    def bump(self, collection_name: str):
+        self.versions[collection_name][self.worker_id] += 1
+
+    def own(self) -> dict:
+        return {name: counts[self.worker_id] for name, counts in self.versions.items() if counts[self.worker_id]}
+
+    def merge(self, worker_id: str, versions: dict):
+        for name, count in versions.items():
+            counts = self.versions[name]
+            counts[worker_id] = max(counts[worker_id], count)
+
+    def etag(self, *collection_names: str) -> str:
+        versions = "-".join(
+            name + ".".join(f"{worker}:{count}" for worker, count in sorted(self.versions[name].items()))
+            for name in collection_names
+        )
+        return f'W/"{self.epoch}-{hashlib.sha1(versions.encode()).hexdigest()[:16]}"'
+
+collection_versions = CollectionVersions(cluster.worker_id, os.environ.get('CLUSTER_EPOCH'))
+
+def document_etag(doc: dict) -> str:
+    # Rebalancing rewrites task ranks without touching updated_at, so ranks are part of the tag
+    rank = f'-{doc["rank"]}' if doc.get("rank") else ""
+    return f'W/"{doc["id"]}-{doc["updated_at"].timestamp():.3f}{rank}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore any W/ prefix on either side
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+# Document cache
+class DocumentCache:
+    """Read-through LRU cache of single documents keyed by id, with a TTL.
+
+    Writes refresh or drop entries via record_task_change/record_project_change; the TTL
+    bounds staleness for writes this process never sees (other workers, direct DB edits).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every write so a fill that raced a write is discarded
+        self.write_seq = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, doc: dict, write_seq: Optional[int] = None):
+        if not self.enabled or (write_seq is not None and write_seq != self.write_seq):
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, doc)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def refresh(self, key: str, doc: dict):
+        """Replace an entry that is already cached; writes alone never fill the cache."""
+        self.write_seq += 1
+        if key in self.entries:
+            self.put(key, doc)
+
+    def invalidate(self, key: str):
+        self.write_seq += 1
+        self.entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        self.write_seq += 1
+        for key in [key for key, (_, doc) in self.entries.items() if predicate(doc)]:
+            del self.entries[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+DOC_CACHE_SIZE = int(os.environ.get('DOC_CACHE_SIZE', '10000'))
+DOC_CACHE_TTL = float(os.environ.get('DOC_CACHE_TTL', '30'))
+task_cache = DocumentCache(max_size=DOC_CACHE_SIZE, ttl=DOC_CACHE_TTL)
+project_cache = DocumentCache(max_size=DOC_CACHE_SIZE, ttl=DOC_CACHE_TTL)
+
+async def cached_lookup(cache: DocumentCache, key: str, load) -> Optional[dict]:
+    doc = cache.get(key)
+    if doc is None:
+        write_seq = cache.write_seq
+        doc = await load(key)
+        if doc is not None:
+            cache.put(key, doc, write_seq)
+    return doc
+
+async def cached_lookup_many(cache: DocumentCache, keys, load_many) -> dict:
+    """cached_lookup for a batch: cache hits first, then one load_many() call for every miss."""
+    found, missing = {}, []
+    for key in dict.fromkeys(keys):
+        doc = cache.get(key)
+        if doc is None:
+            missing.append(key)
+        else:
+            found[key] = doc
+    if missing:
+        write_seq = cache.write_seq
+        for doc in await load_many(missing):
+            found[doc["id"]] = doc
+            cache.put(doc["id"], doc, write_seq)
+    return found
+
+def record_task_change(old_task: Optional[dict], new_task: Optional[dict]):
+    """Feed a committed task write into the stats cache, ETag versions and the change feed."""
+    # Post-images are built from request values; cache and publish them as storage holds them
+    new_task = stored_form(new_task) if new_task is not None else None
+    collection_versions.bump("tasks")
+    if new_task is None:
+        task_cache.invalidate(old_task["id"])
+    else:
+        task_cache.refresh(new_task["id"], new_task)
+    if old_task is None:
+        stats_cache.task_created(new_task)
+    elif new_task is None:
+        stats_cache.task_deleted(old_task)
+    else:
+        stats_cache.task_updated(old_task, new_task)
+    if event_broker.source == "inprocess":
+        event_broker.publish(task_event(old_task, new_task))
+    worker_sync.share({"type": "task", "old": old_task, "new": new_task})
+
+def record_project_change(action: str, project: dict):
+    project = stored_form(project)
+    collection_versions.bump("projects")
+    if action == "deleted":
+        project_cache.invalidate(project["id"])
+    else:
+        project_cache.refresh(project["id"], project)
+    if action == "created":
+        stats_cache.project_created()
+    if event_broker.source == "inprocess":
+        event_broker.publish(project_event(action, project))
+    worker_sync.share({"type": "project", "action": action, "project": project})
+
+def record_tasks_archived(tasks: list):
+    """Like record_task_change for a batch of tasks the archiver moved out of the live collection."""
+    collection_versions.bump("tasks")
+    for task in tasks:
+        task_cache.invalidate(task["id"])
+        stats_cache.task_deleted(task)
+    if event_broker.source == "inprocess":
+        event_broker.publish(archived_event(tasks))
+    worker_sync.share({"type": "tasks.archived", "tasks": [
+        {field: task.get(field) for field in ("id", "project_id", "status", "priority")} for task in tasks
+    ]})
+
+def project_task_count_deltas(changes: list) -> dict:
+    """Net change in each project's task counters for a list of (old_task, new_task) pairs."""
+    deltas = defaultdict(Counter)
+    for old_task, new_task in changes:
+        for task, sign in ((old_task, -1), (new_task, 1)):
+            if task and task.get("project_id"):
+                status = TaskStatus(task["status"])
+                counts = deltas[task["project_id"]]
+                counts[status.value] += sign
+                counts["high_priority_open"] += sign * (task.get("priority") == TaskPriority.HIGH and status != TaskStatus.DONE)
+    return {project_id: {field: delta for field, delta in counts.items() if delta}
+            for project_id, counts in deltas.items() if any(counts.values())}
+
+async def record_project_task_counts(changes: list):
+    """$inc the counters of the projects touched by committed task writes; repair_project_task_counts fixes drift."""
+    deltas = project_task_count_deltas(changes)
+    if deltas:
+        await storage.inc_project_task_counts(deltas)
+
+# Idempotency keys
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = int(os.environ.get('IDEMPOTENCY_PENDING_TIMEOUT_SECONDS', '30'))
+
+class IdempotentWrites:
+    """Idempotency-Key support for the create routes.
+
+    The first request with a key claims it in storage, runs the write and stores the response;
+    repeats replay that response instead of inserting again. Identical requests already in flight
+    in this process wait on the first one's future rather than racing it to the claim.
+    """
+
+    def __init__(self, ttl_seconds: int = 86400, pending_timeout_seconds: int = 30):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.pending_timeout = timedelta(seconds=pending_timeout_seconds)
+        self.in_flight = {}
+
+    async def run(self, scope: str, key: str, payload: dict, create) -> tuple:
+        """Return (response document, replayed) for `create()` guarded by `key`."""
+        key = f"{scope}:{key}"
+        request_hash = hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        if key in self.in_flight:
+            in_flight_hash, future = self.in_flight[key]
+            self._check_hash(in_flight_hash, request_hash)
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = (request_hash, future)
+        try:
+            result = await self._run_once(key, request_hash, create)
+            future.set_result(result[0])
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; waiters, if any, still see it
+            raise
+        finally:
+            del self.in_flight[key]
+
+    async def _run_once(self, key: str, request_hash: str, create) -> tuple:
+        now = datetime.utcnow()
+        record = await storage.claim_idempotency_key(
+            key, request_hash, now, now + self.ttl, stale_before=now - self.pending_timeout
+        )
+        if record is not None:
+            self._check_hash(record["request_hash"], request_hash)
+            if record["state"] != "done":
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            return record["response"], True
+        try:
+            doc = await create()
+        except BaseException:
+            await storage.release_idempotency_key(key)
+            raise
+        await storage.complete_idempotency_key(key, doc)
+        return doc, False
+
+    @staticmethod
+    def _check_hash(stored_hash: str, request_hash: str):
+        if stored_hash != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+
+idempotent_writes = IdempotentWrites(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+
+def created_response(doc: dict, replayed: bool) -> ORJSONResponse:
+    return ORJSONResponse(doc, headers={"Idempotent-Replayed": "true"} if replayed else None)
+
+# Background project deletion
+PROJECT_DELETE_BATCH_SIZE = int(os.environ.get('PROJECT_DELETE_BATCH_SIZE', '1000'))
+PROJECT_DELETE_BATCH_PAUSE = float(os.environ.get('PROJECT_DELETE_BATCH_PAUSE', '0.05'))
+
+class ProjectDeletions:
+    """Cascade deletes run in the background: tasks go in bounded batches, then the project.
+
+    Projects are marked `deleting` up front; their tasks are hidden from reads until the job finishes.
+    """
+
+    def __init__(self, batch_size: int = 1000, pause: float = 0.05, max_finished_jobs: int = 1000):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = {}
+        self.deleting = set()
+        self._runners = set()
+
+    def start(self, project_id: str) -> dict:
+        job = self.jobs.get(project_id)
+        if job and job["state"] == "deleting":
+            return job
+        self._prune()
+        job = {"project_id": project_id, "state": "deleting", "deleted_tasks": 0,
+               "started_at": datetime.utcnow(), "finished_at": None, "error": None}
+        self.jobs[project_id] = job
+        self.deleting.add(project_id)
+        worker_sync.share({"type": "project.deleting", "project_id": project_id})
+        runner = asyncio.create_task(self._run(job))
+        self._runners.add(runner)
+        runner.add_done_callback(self._runners.discard)
+        return job
+
+    def _prune(self):
+        if len(self.jobs) < self.max_finished_jobs:
+            return
+        for project_id, job in list(self.jobs.items()):
+            if job["state"] != "deleting":
+                del self.jobs[project_id]
+
+    async def _run(self, job: dict):
+        project_id = job["project_id"]
+        try:
+            while True:
+                deleted = await storage.delete_project_tasks(project_id, self.batch_size)
+                if not deleted:
+                    break
+                job["deleted_tasks"] += deleted
+                await asyncio.sleep(self.pause)
+            await storage.delete_project(project_id)
+            job["state"] = "deleted"
+            self.deleting.discard(project_id)
+            collection_versions.bump("tasks")
+            task_cache.invalidate_where(lambda task: task.get("project_id") == project_id)
+            worker_sync.share({"type": "project.deleted", "project_id": project_id})
+            logger.info(f"Deleted project {project_id} and {job['deleted_tasks']} tasks")
+        except Exception as e:
+            # Leave the project hidden and marked `deleting`; the job resumes on next startup
+            job["state"] = "failed"
+            job["error"] = str(e)
+            logger.error(f"Deleting project {project_id} failed: {e}")
+        finally:
+            job["finished_at"] = datetime.utcnow()
+
+    async def resume(self, run_jobs: bool = True):
+        """Pick up projects left marked `deleting`; without run_jobs only hide them (another worker runs the jobs)."""
+        for project_id in await storage.deleting_project_ids():
+            if run_jobs:
+                self.start(project_id)
+            else:
+                self.deleting.add(project_id)
+
+project_deletions = ProjectDeletions(batch_size=PROJECT_DELETE_BATCH_SIZE, pause=PROJECT_DELETE_BATCH_PAUSE)
+
+# Kanban ordering
+TASK_RANK_MAX_LENGTH = int(os.environ.get('TASK_RANK_MAX_LENGTH', '32'))
+TASK_RERANK_BATCH_SIZE = 1000
+
+def rank_of(task: dict) -> str:
+    """A task's rank; tasks stored before ranks existed get the key the startup backfill gives them."""
+    return task.get("rank") or initial_rank(task["created_at"], task["id"])
+
+class ColumnRebalances:
+    """Respace the rank keys of a Kanban column once moves have made them too long.
+
+    Runs on the leader only (other workers forward the request), so two rebalances of a column
+    never interleave their writes.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.running = set()
+        self._runners = set()
+
+    def request(self, project_id: str, status: str):
+        if cluster.is_leader:
+            self.start(project_id, status)
+        else:
+            worker_sync.share({"type": "tasks.rebalance", "project_id": project_id, "status": status})
+
+    def start(self, project_id: str, status: str):
+        column = (project_id, status)
+        if column in self.running:
+            return
+        self.running.add(column)
+        runner = asyncio.create_task(self._run(column))
+        self._runners.add(runner)
+        runner.add_done_callback(self._runners.discard)
+
+    async def _run(self, column: tuple):
+        project_id, status = column
+        try:
+            task_ids, after = [], None
+            while True:
+                batch = await storage.list_ranked_tasks(project_id, status, limit=self.batch_size, after=after,
+                                                        fields=("id", "status", "rank"))
+                task_ids.extend(task["id"] for task in batch)
+                if len(batch) < self.batch_size:
+                    break
+                after = (batch[-1]["status"], batch[-1]["rank"], batch[-1]["id"])
+            # Start above the current new-task key so tasks created later still land on top
+            ranks = rebalance_ranks(len(task_ids), below=new_rank())
+            for start in range(0, len(task_ids), self.batch_size):
+                batch_ids = task_ids[start:start + self.batch_size]
+                await storage.set_task_ranks(dict(zip(batch_ids, ranks[start:start + self.batch_size])))
+            collection_versions.bump("tasks")
+            task_cache.invalidate_where(lambda task: task.get("project_id") == project_id and task.get("status") == status)
+            worker_sync.share({"type": "tasks.reranked", "project_id": project_id, "status": status})
+            logger.info(f"Rebalanced {len(task_ids)} {status} tasks of project {project_id}")
+        except Exception as e:
+            logger.error(f"Rebalancing {status} tasks of project {project_id} failed: {e}")
+        finally:
+            self.running.discard(column)
+
+column_rebalances = ColumnRebalances(batch_size=TASK_RERANK_BATCH_SIZE)
+
+# Archive
+# Opt-in: archived tasks leave the default reads (they carry `archived_at` under include_archived=true)
+ARCHIVE_DONE_AFTER_DAYS = float(os.environ.get('ARCHIVE_DONE_AFTER_DAYS', '0'))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '3600'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+ARCHIVE_BATCH_PAUSE = float(os.environ.get('ARCHIVE_BATCH_PAUSE', '0.05'))
+
+class TaskArchiver:
+    """Periodically move done tasks untouched for `done_after_days` into the archive, in batches.
+
+    Runs on the leader only; each run's report is stored so any worker can list it.
+    """
+
+    def __init__(self, done_after_days: float = 30, interval: float = 3600, batch_size: int = 1000, pause: float = 0.05):
+        self.enabled = done_after_days > 0
+        self.done_after = timedelta(days=done_after_days)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.current = None
+        self._runner = None
+
+    def request(self):
+        if cluster.is_leader:
+            self.start()
+        else:
+            worker_sync.share({"type": "tasks.archive"})
+
+    def start(self):
+        if self.current is None:
+            self._runner = asyncio.create_task(self.run_once())
+
+    async def run_once(self) -> dict:
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        run = {"id": str(uuid.uuid4()), "started_at": now, "finished_at": None, "done_before": now - self.done_after,
+               "archived": 0, "batches": 0, "duration_ms": None, "error": None}
+        self.current = run
+        try:
+            while True:
+                batch = await storage.archive_done_tasks(run["done_before"], datetime.utcnow(), self.batch_size)
+                if batch:
+                    record_tasks_archived(batch)
+                    await record_project_task_counts([(task, None) for task in batch])
+                    run["archived"] += len(batch)
+                    run["batches"] += 1
+                if len(batch) < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause)
+        except Exception as e:
+            run["error"] = str(e)
+            logger.error(f"Archiving done tasks failed: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            run["finished_at"] = datetime.utcnow()
+            run["duration_ms"] = round(elapsed * 1000, 1)
+            self.current = None
+            ARCHIVED_TASKS.inc(amount=run["archived"])
+            ARCHIVE_RUN_DURATION.observe(elapsed)
+            logger.info(f"Archived {run['archived']} done tasks in {run['batches']} batches, {run['duration_ms']:.0f}ms")
+        try:
+            await storage.insert_archive_run(run)
+        except Exception as e:
+            logger.error(f"Failed to record archive run: {e}")
+        return run
+
+    async def run_forever(self):
+        while True:
+            if self.current is None:
+                await self.run_once()
+            await asyncio.sleep(self.interval)
+
+task_archiver = TaskArchiver(ARCHIVE_DONE_AFTER_DAYS, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE)
+
+# Cross-worker state
+class WorkerSync:
+    """Keeps this worker's in-process state in step with writes made by its peers.
+
+    Every committed write is broadcast with the writer's version counts. Receivers merge the
+    versions (so list ETags agree), drop rather than refresh cached documents, apply stats
+    deltas and fan events out to their own SSE subscribers. Delivery is asynchronous, so a peer
+    may serve the previous state for the few milliseconds a message is in flight. Metrics,
+    in-flight idempotency futures and the stats reconcile loop stay per-worker.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._pending = set()
+
+    def share(self, message: dict):
+        if self.broker.shared:
+            self.broker.publish({**message, "worker": self.broker.worker_id, "versions": collection_versions.own()})
+
+    def apply(self, message: dict):
+        collection_versions.merge(message["worker"], message["versions"])
+        kind = message["type"]
+        if kind == "task":
+            old_task, new_task = message["old"], message["new"]
+            task_cache.invalidate((new_task or old_task)["id"])
+            if old_task is None:
+                stats_cache.task_created(new_task)
+            elif new_task is None:
+                stats_cache.task_deleted(old_task)
+            else:
+                stats_cache.task_updated(old_task, new_task)
+            if event_broker.source == "inprocess":
+                event_broker.publish(task_event(old_task, new_task))
+        elif kind == "project":
+            project = message["project"]
+            project_cache.invalidate(project["id"])
+            if message["action"] == "created":
+                stats_cache.project_created()
+            if event_broker.source == "inprocess":
+                event_broker.publish(project_event(message["action"], project))
+        elif kind == "project.deleting":
+            project_deletions.deleting.add(message["project_id"])
+            if stats_cache.enabled:
+                self._spawn(stats_cache.reconcile())
+        elif kind == "project.deleted":
+            project_id = message["project_id"]
+            project_deletions.deleting.discard(project_id)
+            task_cache.invalidate_where(lambda task: task.get("project_id") == project_id)
+        elif kind == "tasks.archived":
+            tasks = message["tasks"]
+            for task in tasks:
+                task_cache.invalidate(task["id"])
+                stats_cache.task_deleted(task)
+            if event_broker.source == "inprocess":
+                event_broker.publish(archived_event(tasks))
+        elif kind == "tasks.archive":
+            if self.broker.is_leader:
+                task_archiver.start()
+        elif kind == "tasks.rebalance":
+            if self.broker.is_leader:
+                column_rebalances.start(message["project_id"], message["status"])
+        elif kind == "tasks.reranked":
+            project_id, status = message["project_id"], message["status"]
+            task_cache.invalidate_where(lambda task: task.get("project_id") == project_id and task.get("status") == status)
+        elif kind == "hello":
+            # A worker (re)joined: tell it our counts so its ETags catch up
+            self.share({"type": "versions"})
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def join(self):
+        """Connect to the peers; the cluster's leader runs the singleton jobs."""
+        # Start from a version no peer has handed out yet, then learn the peers' counts
+        for collection_name in ("tasks", "projects"):
+            collection_versions.bump(collection_name)
+        await self.broker.start(self.apply, self.lead)
+        self.share({"type": "hello"})
+
+    async def lead(self):
+        logger.info(f"Worker {self.broker.worker_id} is the leader; running singleton jobs")
+        await resume_project_deletions()
+        app.state.background_tasks.append(asyncio.create_task(repair_project_task_counts()))
+        app.state.background_tasks.append(asyncio.create_task(backfill_task_ranks()))
+        if task_archiver.enabled:
+            app.state.background_tasks.append(asyncio.create_task(task_archiver.run_forever()))
+
+worker_sync = WorkerSync(cluster)
+
 # Routes
 
 @api_router.get("/")
 async def root():
     return {"message": "Todo List API is running!"}
 
+# Health
+READY_MAX_DB_LATENCY_MS = float(os.environ.get('READY_MAX_DB_LATENCY_MS', '250'))
+
+@api_router.get("/health/ready")
+async def readiness():
+    """200 once this worker's pool is warm and a DB round trip fits READY_MAX_DB_LATENCY_MS, 503 otherwise."""
+    headers = {"Cache-Control": "no-store"}
+    if not getattr(app.state, "warm", False) and not await warm_up_storage():
+        return ORJSONResponse({"status": "warming_up"}, status_code=503, headers=headers)
+    start = time.perf_counter()
+    try:
+        await storage.ping()
+    except Exception as e:
+        return ORJSONResponse({"status": "unavailable", "error": str(e)}, status_code=503, headers=headers)
+    latency_ms = round((time.perf_counter() - start) * 1000, 2)
+    if latency_ms > READY_MAX_DB_LATENCY_MS:
+        return ORJSONResponse({"status": "slow", "db_latency_ms": latency_ms}, status_code=503, headers=headers)
+    return ORJSONResponse({"status": "ready", "db_latency_ms": latency_ms}, headers=headers)
+
 # Dashboard Stats
 @api_router.get("/stats", response_model=dict)
-async def get_dashboard_stats():
+async def get_dashboard_stats(request: Request, response: Response, include_archived: bool = False):
+    """Counts cover live tasks; include_archived adds the archive (a slower, uncached query)."""
+    etag = collection_versions.etag("tasks", "projects")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     try:
-        # Task stats
-        total_tasks = await db.tasks.count_documents({})
-        completed_tasks = await db.tasks.count_documents({"status": TaskStatus.DONE})
-        pending_tasks = total_tasks - completed_tasks
-        high_priority_tasks = await db.tasks.count_documents({"priority": TaskPriority.HIGH, "status": {"$ne": TaskStatus.DONE}})
-        
-        # Project stats
-        total_projects = await db.projects.count_documents({})
-        projects_with_tasks = await db.tasks.distinct("project_id", {"project_id": {"$ne": None}})
-        active_projects = len([p for p in projects_with_tasks if p is not None])
-        
-        return {
-            "tasks": {
-                "total": total_tasks,
-                "completed": completed_tasks,
-                "pending": pending_tasks,
-                "high_priority": high_priority_tasks
-            },
-            "projects": {
-                "total": total_projects,
-                "active": active_projects
-            }
-        }
+        if stats_cache.enabled and stats_cache.ready and not include_archived:
+            return stats_cache.snapshot()
+
+        counts = await storage.dashboard_counts(project_deletions.deleting, include_archived=include_archived)
+        return format_stats(
+            counts["total"],
+            counts["completed"],
+            counts["high_priority"],
+            counts["total_projects"],
+            counts["active_projects"],
+        )
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/metrics")
+async def get_metrics():
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/debug/queries")
+async def get_query_profiles(limit: int = Query(50, ge=1, le=200)):
+    """Recent request profiles, newest first: operation count and database time per request."""
+    if not QUERY_PROFILING:
+        raise HTTPException(status_code=404, detail="Query profiling is off (QUERY_PROFILING=true enables it)")
+    return json_response(query_profiler.recent(limit))
+
+@api_router.get("/debug/queries/{profile_id}")
+async def get_query_profile(profile_id: str):
+    """Every Mongo operation of one request; the id comes from its X-Query-Profile header."""
+    profile = query_profiler.get(profile_id) if QUERY_PROFILING else None
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json_response(profile)
+
+@api_router.get("/cache/stats", response_model=dict)
+async def get_cache_stats():
+    return {"tasks": task_cache.stats(), "projects": project_cache.stats()}
+
 # Task Routes
 @api_router.post("/tasks", response_model=Task)
-async def create_task(task_data: TaskCreate):
+async def create_task(task_data: TaskCreate, idempotency_key: Optional[str] = Header(None, max_length=255)):
+    async def create():
+        task_doc = stored_form(Task(**task_data.dict()).dict())
+        await storage.insert_task(task_doc)
+        record_task_change(None, task_doc)
+        await record_project_task_counts([(None, task_doc)])
+        return task_doc
+
     try:
-        task_dict = task_data.dict()
-        task = Task(**task_dict)
-        await db.tasks.insert_one(task.dict())
-        return task
+        if idempotency_key is None:
+            return await create()
+        return created_response(*await idempotent_writes.run("tasks", idempotency_key, task_data.dict(), create))
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/tasks", response_model=List[Task])
-async def get_tasks(project_id: Optional[str] = None, status: Optional[TaskStatus] = None):
+@api_router.post("/tasks/bulk", response_model=BulkTaskResponse)
+async def bulk_tasks(bulk_request: BulkTaskRequest):
+    """Apply a batch of create/update/delete operations in one storage call.
+
+    Operations in a batch are not ordered relative to each other, so a task may be the target
+    of at most one update or delete per batch; each item gets its own result.
+    """
     try:
-        filter_dict = {}
-        if project_id:
-            filter_dict["project_id"] = project_id
-        if status:
-            filter_dict["status"] = status
-            
-        tasks = await db.tasks.find(filter_dict).sort("created_at", -1).to_list(1000)
-        return [Task(**task) for task in tasks]
+        operations = bulk_request.operations
+        results = [None] * len(operations)
+        writes, write_owners = [], []
+        now = datetime.utcnow()
+
+        targeted = set()
+        for index, operation in enumerate(operations):
+            try:
+                if operation.op == BulkOperationType.CREATE:
+                    task = Task(**TaskCreate(**(operation.data or {})).dict())
+                    writes.append(("insert", stored_form(task.dict())))
+                    task_id = task.id
+                else:
+                    task_id = operation.id
+                    if not task_id:
+                        raise ValueError("id is required")
+                    if task_id in targeted:
+                        raise ValueError("Task is already the target of another operation in this batch")
+                    targeted.add(task_id)
+                    if operation.op == BulkOperationType.UPDATE:
+                        update_data = {k: v for k, v in TaskUpdate(**(operation.data or {})).dict().items() if v is not None}
+                        update_data["updated_at"] = now
+                        writes.append(("update", task_id, update_data))
+                    else:
+                        writes.append(("delete", task_id))
+            except (ValidationError, ValueError) as e:
+                results[index] = BulkTaskResult(index=index, op=operation.op, id=operation.id, ok=False, error=str(e))
+                continue
+            write_owners.append(index)
+            results[index] = BulkTaskResult(index=index, op=operation.op, id=task_id, ok=True)
+
+        outcome = await storage.bulk_write_tasks(writes)
+        failed = outcome["errors"]
+        committed = []
+        for write_index, index in enumerate(write_owners):
+            if write_index in failed:
+                results[index].ok = False
+                results[index].error = failed[write_index]
+                continue
+            # Stats, counters and events follow the pre-image each write replaced, not an earlier read
+            write = writes[write_index]
+            old_task = outcome["previous"].get(write_index)
+            if write[0] == "insert":
+                change = (None, write[1])
+            elif write[0] == "update":
+                change = (old_task, {**old_task, **write[2]})
+            else:
+                change = (old_task, None)
+            record_task_change(*change)
+            committed.append(change)
+        await record_project_task_counts(committed)
+
+        return BulkTaskResponse(
+            inserted=outcome["inserted"],
+            updated=outcome["updated"],
+            deleted=outcome["deleted"],
+            results=results,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/tasks", response_model=Union[List[Task], TaskPage])
+async def get_tasks(
+    request: Request,
+    project_id: Optional[str] = None,
+    status: Optional[TaskStatus] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+):
+    after = decode_cursor(cursor) if cursor else None
+    projection = parse_fields(fields, Task)
+    etag = collection_versions.etag("tasks")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        filters = {"project_id": project_id, "status": status, "exclude_project_ids": project_deletions.deleting,
+                   "fields": projection, "include_archived": include_archived}
+
+        if limit or cursor:
+            tasks, next_cursor = await fetch_page(storage.list_tasks, limit or DEFAULT_PAGE_SIZE, after, **filters)
+            return json_response({"items": tasks, "next_cursor": next_cursor}, etag)
+
+        tasks = await storage.list_tasks(limit=1000, **filters)
+        return json_response(tasks, etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/tasks/search", response_model=TaskSearchPage)
+async def search_tasks(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: Optional[str] = None,
+    status: Optional[TaskStatus] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    after = decode_search_cursor(cursor) if cursor else None
+    etag = collection_versions.etag("tasks")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        tasks, next_cursor = await fetch_page(
+            storage.search_tasks, limit, after, encode=encode_search_cursor,
+            query=q, project_id=project_id, status=status, exclude_project_ids=project_deletions.deleting,
+        )
+        return json_response({"items": tasks, "next_cursor": next_cursor}, etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored datetimes are naive UTC; bring query parameters onto the same footing."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+@api_router.get("/tasks/due", response_model=TaskPage)
+async def get_due_tasks(
+    request: Request,
+    before: Optional[datetime] = None,
+    after: Optional[datetime] = None,
+    overdue: bool = False,
+    project_id: Optional[str] = None,
+    status: Optional[TaskStatus] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Open tasks with a due date, soonest first; overdue=true caps `before` at now."""
+    if status == TaskStatus.DONE:
+        raise HTTPException(status_code=400, detail="Due-date queries only cover open tasks")
+    keyset = decode_cursor(cursor) if cursor else None
+    before, after = utc_naive(before), utc_naive(after)
+    if overdue:
+        now = datetime.utcnow()
+        before = min(before, now) if before else now
+    # Overdue results change as time passes, not only on writes, so they get no ETag
+    etag = None if overdue else collection_versions.etag("tasks")
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        tasks, next_cursor = await fetch_page(
+            storage.list_due_tasks, limit, keyset, encode=encode_due_cursor,
+            due_before=before, due_after=after, project_id=project_id, status=status,
+            exclude_project_ids=project_deletions.deleting,
+        )
+        return json_response({"items": tasks, "next_cursor": next_cursor}, etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/tasks/archive/runs", response_model=List[ArchiveRun])
+async def get_archive_runs(limit: int = Query(20, ge=1, le=100)):
+    """Reports of recent archive runs, newest first, including one still in progress."""
+    try:
+        runs = await storage.list_archive_runs(limit)
+        if task_archiver.current:
+            runs = [task_archiver.current, *runs][:limit]
+        return runs
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/tasks/archive/runs", status_code=202)
+async def start_archive_run():
+    """Archive now instead of waiting for the next scheduled run."""
+    if not task_archiver.enabled:
+        raise HTTPException(status_code=409, detail="Archiving is disabled (set ARCHIVE_DONE_AFTER_DAYS to enable it)")
+    task_archiver.request()
+    return {"message": "Archive run requested"}
+
+@api_router.post("/tasks/batch-get", response_model=TaskBatchGetResponse)
+async def batch_get_tasks(batch_request: TaskBatchGetRequest):
+    """Resolve many task ids with one query; results follow request order, duplicates included."""
+    try:
+        tasks = await cached_lookup_many(task_cache, batch_request.ids, storage.get_tasks_by_ids)
+        projects = {}
+        if batch_request.embed_project:
+            project_ids = [task["project_id"] for task in tasks.values() if task.get("project_id")]
+            if project_ids:
+                projects = await cached_lookup_many(project_cache, project_ids, storage.get_projects_by_ids)
+        results = []
+        for task_id in batch_request.ids:
+            task = tasks.get(task_id)
+            result = {"id": task_id, "found": task is not None, "task": task}
+            if batch_request.embed_project:
+                result["project"] = projects.get(task.get("project_id")) if task else None
+            results.append(result)
+        return json_response({"results": results})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/tasks/{task_id}", response_model=Task)
-async def get_task(task_id: str):
+async def get_task(task_id: str, request: Request, include_archived: bool = False):
     try:
-        task = await db.tasks.find_one({"id": task_id})
+        task = await cached_lookup(task_cache, task_id, storage.get_task)
+        if not task and include_archived:
+            task = await storage.get_archived_task(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
-        return Task(**task)
+        etag = document_etag(task)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return json_response(task, etag)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.put("/tasks/{task_id}", response_model=Task)
 async def update_task(task_id: str, task_update: TaskUpdate):
     try:
-        task = await db.tasks.find_one({"id": task_id})
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        
         update_data = {k: v for k, v in task_update.dict().items() if v is not None}
         update_data["updated_at"] = datetime.utcnow()
-        
-        await db.tasks.update_one({"id": task_id}, {"$set": update_data})
-        
-        updated_task = await db.tasks.find_one({"id": task_id})
+
+        # Take the pre-image so the stats cache can diff it; the post-image is just the update applied
+        task = await storage.update_task(task_id, update_data)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        updated_task = stored_form({**task, **update_data})
+        record_task_change(task, updated_task)
+        await record_project_task_counts([(task, updated_task)])
         return Task(**updated_task)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/tasks/{task_id}/move", response_model=Task)
+async def move_task(task_id: str, move: TaskMove):
+    """Put a task into a column between two neighbours; only the moved task is rewritten.
+
+    Omit prev_id to move to the top of the column, next_id to move to the bottom, and both when
+    the column is empty. Neighbours that have since left the column get a 409; reload and retry.
+    """
+    try:
+        neighbor_ids = [neighbor_id for neighbor_id in (move.prev_id, move.next_id) if neighbor_id]
+        if task_id in neighbor_ids:
+            raise HTTPException(status_code=400, detail="A task cannot be its own neighbor")
+        tasks = {task["id"]: task for task in await storage.get_tasks_by_ids([task_id, *neighbor_ids])}
+        task = tasks.get(task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        for neighbor_id in neighbor_ids:
+            neighbor = tasks.get(neighbor_id)
+            if (not neighbor or neighbor.get("project_id") != task.get("project_id")
+                    or neighbor["status"] != move.status.value):
+                raise HTTPException(status_code=409, detail=f"Task {neighbor_id} is no longer in the target column")
+
+        prev_task, next_task = tasks.get(move.prev_id), tasks.get(move.next_id)
+        try:
+            if neighbor_ids:
+                rank = rank_between(prev_task and rank_of(prev_task), next_task and rank_of(next_task))
+            else:
+                rank = rank_of(task)
+        except ValueError:
+            # The neighbours are out of order or share a key; respacing the column sorts that out
+            if task.get("project_id"):
+                column_rebalances.request(task["project_id"], move.status.value)
+            raise HTTPException(status_code=409, detail="Neighbors are not adjacent; reload the column and retry")
+
+        update_data = {"status": move.status, "rank": rank, "updated_at": datetime.utcnow()}
+        old_task = await storage.update_task(task_id, update_data)
+        if not old_task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        moved_task = stored_form({**old_task, **update_data})
+        record_task_change(old_task, moved_task)
+        await record_project_task_counts([(old_task, moved_task)])
+        if len(rank) > TASK_RANK_MAX_LENGTH and task.get("project_id"):
+            column_rebalances.request(task["project_id"], move.status.value)
+        return Task(**moved_task)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.delete("/tasks/{task_id}")
 async def delete_task(task_id: str):
     try:
-        result = await db.tasks.delete_one({"id": task_id})
-        if result.deleted_count == 0:
+        task = await storage.delete_task(task_id)
+        if not task:
             raise HTTPException(status_code=404, detail="Task not found")
+        record_task_change(task, None)
+        await record_project_task_counts([(task, None)])
         return {"message": "Task deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Project Routes
 @api_router.post("/projects", response_model=Project)
-async def create_project(project_data: ProjectCreate):
+async def create_project(project_data: ProjectCreate, idempotency_key: Optional[str] = Header(None, max_length=255)):
+    async def create():
+        project_doc = stored_form(Project(**project_data.dict()).dict())
+        await storage.insert_project(project_doc)
+        record_project_change("created", project_doc)
+        return project_doc
+
     try:
-        project_dict = project_data.dict()
-        project = Project(**project_dict)
-        await db.projects.insert_one(project.dict())
-        return project
+        if idempotency_key is None:
+            return await create()
+        return created_response(*await idempotent_writes.run("projects", idempotency_key, project_data.dict(), create))
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/projects", response_model=List[Project])
-async def get_projects():
+@api_router.get("/projects", response_model=Union[List[Project], ProjectPage])
+async def get_projects(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    after = decode_cursor(cursor) if cursor else None
+    projection = parse_fields(fields, Project)
+    etag = collection_versions.etag("projects")
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
-        projects = await db.projects.find().sort("created_at", -1).to_list(1000)
-        return [Project(**project) for project in projects]
+        if limit or cursor:
+            projects, next_cursor = await fetch_page(storage.list_projects, limit or DEFAULT_PAGE_SIZE, after, fields=projection)
+            return json_response({"items": projects, "next_cursor": next_cursor}, etag)
+
+        projects = await storage.list_projects(limit=1000, fields=projection)
+        return json_response(projects, etag)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/projects/summary", response_model=List[ProjectSummary])
+async def get_project_summaries(request: Request):
+    """Every visible project with its task counters, in one query."""
+    etag = collection_versions.etag("tasks", "projects")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        return json_response(await storage.list_project_summaries(limit=1000), etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/projects/summary/repair")
+async def repair_project_summaries():
+    """Recompute every project's task counters from its tasks."""
+    try:
+        return {"repaired": await recount_project_tasks()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/projects/batch-get", response_model=ProjectBatchGetResponse)
+async def batch_get_projects(batch_request: BatchGetRequest):
+    """Resolve many project ids with one query; results follow request order, duplicates included."""
+    try:
+        projects = await cached_lookup_many(project_cache, batch_request.ids, storage.get_projects_by_ids)
+        results = [{"id": project_id, "found": project_id in projects, "project": projects.get(project_id)}
+                   for project_id in batch_request.ids]
+        return json_response({"results": results})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str):
+async def get_project(project_id: str, request: Request):
     try:
-        project = await db.projects.find_one({"id": project_id})
+        project = await cached_lookup(project_cache, project_id, storage.get_project)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
-        return Project(**project)
+        etag = document_etag(project)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return json_response(project, etag)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(project_id: str, project_update: ProjectUpdate):
     try:
-        project = await db.projects.find_one({"id": project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
         update_data = {k: v for k, v in project_update.dict().items() if v is not None}
         update_data["updated_at"] = datetime.utcnow()
-        
-        await db.projects.update_one({"id": project_id}, {"$set": update_data})
-        
-        updated_project = await db.projects.find_one({"id": project_id})
+
+        updated_project = await storage.update_project(project_id, update_data)
+        if not updated_project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        record_project_change("updated", updated_project)
         return Project(**updated_project)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.delete("/projects/{project_id}")
+@api_router.delete("/projects/{project_id}", status_code=202)
 async def delete_project(project_id: str):
     try:
-        # Delete all tasks in the project first
-        await db.tasks.delete_many({"project_id": project_id})
-        
-        # Delete the project
-        result = await db.projects.delete_one({"id": project_id})
-        if result.deleted_count == 0:
+        # Mark the project; its tasks are removed in the background
+        project = await storage.mark_project_deleting(project_id, datetime.utcnow())
+        if not project:
             raise HTTPException(status_code=404, detail="Project not found")
-        return {"message": "Project and all its tasks deleted successfully"}
+
+        job = project_deletions.start(project_id)
+        if not project.get("deleting"):
+            collection_versions.bump("tasks")
+            if stats_cache.enabled:
+                # A cascade can touch any number of tasks, so resync rather than diff
+                await stats_cache.reconcile()
+            record_project_change("deleted", project)
+        return {"message": "Project deletion started", "deletion": ProjectDeletionStatus(**job)}
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/projects/{project_id}/deletion", response_model=ProjectDeletionStatus)
+async def get_project_deletion(project_id: str):
+    job = project_deletions.jobs.get(project_id)
+    if job:
+        return job
+    # No job in this process (e.g. started before a restart): fall back to the stored marker
+    project = await storage.get_project(project_id, include_deleting=True)
+    if not project or not project.get("deleting"):
+        raise HTTPException(status_code=404, detail="No deletion in progress for this project")
+    return ProjectDeletionStatus(project_id=project_id, state="deleting", started_at=project["updated_at"])
+
 # Get tasks for a specific project (Kanban view)
-@api_router.get("/projects/{project_id}/tasks", response_model=List[Task])
-async def get_project_tasks(project_id: str):
+@api_router.get("/projects/{project_id}/tasks", response_model=Union[List[Task], TaskPage])
+async def get_project_tasks(
+    project_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: TaskSort = TaskSort.CREATED_AT,
+    include_archived: bool = False,
+):
+    """sort=rank returns board order: grouped by status, each column in rank order."""
+    by_rank = sort == TaskSort.RANK
+    if by_rank and include_archived:
+        raise HTTPException(status_code=400, detail="Archived tasks are not on the board; use sort=created_at")
+    after = (decode_rank_cursor if by_rank else decode_cursor)(cursor) if cursor else None
+    projection = parse_fields(fields, Task)
+    if projection and by_rank:
+        # Rank cursors are built from these
+        projection = tuple(dict.fromkeys([*projection, "status", "rank"]))
+    etag = collection_versions.etag("tasks")
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
-        tasks = await db.tasks.find({"project_id": project_id}).sort("created_at", -1).to_list(1000)
-        return [Task(**task) for task in tasks]
+        filters = {"project_id": project_id, "exclude_project_ids": project_deletions.deleting, "fields": projection}
+        if include_archived:
+            filters["include_archived"] = True
+        list_docs = storage.list_ranked_tasks if by_rank else storage.list_tasks
+        if limit or cursor:
+            encode = encode_rank_cursor if by_rank else encode_cursor
+            tasks, next_cursor = await fetch_page(list_docs, limit or DEFAULT_PAGE_SIZE, after, encode=encode, **filters)
+            return json_response({"items": tasks, "next_cursor": next_cursor}, etag)
+
+        tasks = await list_docs(limit=1000, **filters)
+        return json_response(tasks, etag)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Unhandled error while handling request")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Export Routes
+@api_router.get("/export/tasks")
+async def export_tasks(project_id: Optional[str] = None, status: Optional[TaskStatus] = None):
+    tasks = storage.iter_tasks(project_id, status, project_deletions.deleting, batch_size=EXPORT_BATCH_SIZE)
+    return StreamingResponse(stream_ndjson(tasks), media_type="application/x-ndjson")
+
+@api_router.get("/export/projects")
+async def export_projects():
+    projects = storage.iter_projects(batch_size=EXPORT_BATCH_SIZE)
+    return StreamingResponse(stream_ndjson(projects), media_type="application/x-ndjson")
+
+# Change feed (Server-Sent Events)
+@api_router.get("/events")
+async def stream_events(request: Request):
+    queue = event_broker.subscribe()
+
+    async def event_stream():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        finally:
+            event_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Compression
+GZIP_MINIMUM_SIZE = int(os.environ.get('GZIP_MINIMUM_SIZE', '1000'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves SSE alone: gzip holds back small writes, which would delay events."""
+
+    def __init__(self, app, skip_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed", "X-Query-Profile", "Server-Timing"],
+)
+app.add_middleware(
+    StreamAwareGZipMiddleware,
+    minimum_size=GZIP_MINIMUM_SIZE,
+    compresslevel=GZIP_LEVEL,
+    skip_paths={"/api/events"},
 )
+app.add_middleware(MetricsMiddleware)
+if QUERY_PROFILING:
+    app.add_middleware(ProfilingMiddleware, profiler=query_profiler)
 
 # Configure logging
 logging.basicConfig(
@@ -275,6 +1828,89 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# Lifespan
+async def create_db_indexes():
+    try:
+        created = await storage.ensure_indexes()
+        for collection_name, names in created.items():
+            if names:
+                logger.info(f"Created indexes on {collection_name}: {', '.join(names)}")
+            else:
+                logger.info(f"Indexes on {collection_name} already up to date")
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
+
+async def warm_up_storage() -> bool:
+    try:
+        start = time.perf_counter()
+        await storage.warm_up(MONGO_CLIENT_OPTIONS["minPoolSize"])
+        logger.info(f"Storage warmed up in {(time.perf_counter() - start) * 1000:.0f}ms")
+        app.state.warm = True
+    except Exception as e:
+        logger.error(f"Storage warm-up failed: {e}")
+    return getattr(app.state, "warm", False)
+
+async def resume_project_deletions(run_jobs: bool = True):
+    try:
+        await project_deletions.resume(run_jobs)
+    except Exception as e:
+        logger.error(f"Failed to resume project deletions: {e}")
+
+async def recount_project_tasks() -> int:
+    """Recompute the stored project counters and move the summary ETag if any changed."""
+    repaired = await storage.repair_project_task_counts()
+    if repaired:
+        collection_versions.bump("projects")
+        worker_sync.share({"type": "versions"})
+    return repaired
+
+async def repair_project_task_counts():
+    # Backfills counters for projects created before they existed
+    try:
+        repaired = await recount_project_tasks()
+        logger.info(f"Project task counters repaired for {repaired} projects")
+    except Exception as e:
+        logger.error(f"Project task counter repair failed: {e}")
+
+async def backfill_task_ranks():
+    # Tasks stored before ranks existed keep their newest-first position
+    try:
+        backfilled = await storage.backfill_task_ranks(rank_of)
+        if backfilled:
+            logger.info(f"Backfilled ranks for {backfilled} tasks")
+    except Exception as e:
+        logger.error(f"Task rank backfill failed: {e}")
+
+async def start_change_stream_watchers() -> list:
+    if event_broker.source != "changestream":
+        return []
+    if not isinstance(storage, MongoStorage):
+        logger.error("EVENTS_SOURCE=changestream requires STORAGE_BACKEND=mongo; no events will be published")
+        return []
+    # Servers before 6.0 reject both the collMod and the pre-image option on watch()
+    try:
+        await storage.enable_change_stream_pre_images()
+        pre_images = True
+    except Exception as e:
+        logger.warning(f"Could not enable change stream pre-images ({e}); deletes will trigger a resync")
+        pre_images = False
+    return [
+        asyncio.create_task(event_broker.watch(storage.db.tasks, "task", pre_images)),
+        asyncio.create_task(event_broker.watch(storage.db.projects, "project", pre_images)),
+    ]
+
+async def startup():
+    app.state.warm = False
+    await warm_up_storage()
+    await create_db_indexes()
+    await resume_project_deletions(run_jobs=False)
+    app.state.background_tasks = await start_change_stream_watchers()
+    await worker_sync.join()
+    if stats_cache.enabled:
+        app.state.background_tasks.append(asyncio.create_task(stats_cache.run_reconciler()))
+
+async def shutdown():
+    for background_task in app.state.background_tasks:
+        background_task.cancel()
+    await cluster.close()
+    await storage.close()
\ No newline at end of file
@@ -0,0 +1,1193 @@
+"""Task and project persistence.
+
+Routes in server.py talk to a Storage instead of Motor collections directly. Two backends:
+
+- MongoStorage: the original Motor-backed store.
+- MemoryStorage: an in-process engine with hash indexes on id, project_id, status and priority,
+  a sorted (created_at, id) index, a board index on (project_id, status, rank, id) and an
+  inverted index for task search. No external services; suited to tests, load tests and
+  small single-process deployments. Data lives only as long as the process.
+
+Done tasks that have sat untouched for a while are moved to a separate archive (the
+tasks_archive collection) by archive_done_tasks; reads leave it out unless include_archived is set.
+
+Documents are plain dicts shaped like the pydantic models and are returned without Mongo's _id.
+Lists are ordered newest first by (created_at, id); `after` is the (created_at, id) of the last
+document on the previous page.
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, timezone
+from enum import Enum
+from itertools import islice
+import asyncio
+import heapq
+import logging
+import re
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError as MongoDuplicateKeyError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+STATUS_DONE = "done"
+OPEN_STATUSES = ("todo", "in_progress")
+PRIORITY_HIGH = "high"
+READ_PROJECTION = {"_id": 0}
+# Projects keep per-status task counters, maintained with $inc and excluded from normal project reads
+TASK_COUNT_FIELDS = ("todo", "in_progress", "done", "high_priority_open")
+PROJECT_READ_PROJECTION = {"_id": 0, "task_counts": 0}
+# Relevance weights for task search; a title hit counts three times a description hit
+TASK_TEXT_WEIGHTS = {"title": 3, "description": 1}
+
+class DuplicateKeyError(Exception):
+    pass
+
+def _plain(value):
+    # Store values as BSON would, so index lookups and comparisons match: enum members as their
+    # values, datetimes as naive UTC with millisecond precision
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+def stored_form(doc: dict) -> dict:
+    """`doc` as either backend would store and return it, for post-images built from a write's input."""
+    return {k: _plain(v) for k, v in doc.items() if k != "_id"}
+
+class Storage:
+    """Interface shared by the backends; see the module docstring for conventions."""
+
+    async def ensure_indexes(self) -> dict:
+        """Create any missing indexes; return the names created per collection.
+
+        Each index is created on its own: one the server rejects is logged and skipped, the rest still build.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def ping(self):
+        """One round trip to the backing store; raises if it is unreachable."""
+
+    async def warm_up(self, connections: int):
+        """Open up to `connections` pooled connections ahead of the first requests."""
+
+    # Tasks
+    async def insert_task(self, task: dict):
+        raise NotImplementedError
+
+    async def get_task(self, task_id: str):
+        raise NotImplementedError
+
+    async def get_tasks_by_ids(self, task_ids: list) -> list:
+        raise NotImplementedError
+
+    async def list_tasks(self, project_id=None, status=None, exclude_project_ids=(), limit=1000, after=None, fields=None,
+                         include_archived=False) -> list:
+        """`fields`, if given, limits each document to those keys (callers always include id and created_at)."""
+        raise NotImplementedError
+
+    def iter_tasks(self, project_id=None, status=None, exclude_project_ids=(), batch_size=500):
+        """Async iterator over every matching task, fetched batch_size at a time."""
+        raise NotImplementedError
+
+    async def update_task(self, task_id: str, fields: dict):
+        """Apply `fields` and return the pre-image, or None if the task does not exist."""
+        raise NotImplementedError
+
+    async def delete_task(self, task_id: str):
+        """Delete and return the task, or None if it does not exist."""
+        raise NotImplementedError
+
+    async def bulk_write_tasks(self, operations: list) -> dict:
+        """Apply ("insert", doc) / ("update", id, fields) / ("delete", id) operations, unordered.
+
+        Returns {"inserted", "updated", "deleted", "errors": {operation index: message}, "previous":
+        {operation index: pre-image}}. An update or delete that matched no task is an error, so every
+        operation not in `errors` took effect; each update and delete that did has its pre-image, as
+        the write found the task, in `previous`.
+        """
+        raise NotImplementedError
+
+    async def search_tasks(self, query: str, project_id=None, status=None, exclude_project_ids=(), limit=100, after=None) -> list:
+        """Tasks matching any term of `query` in title or description, best match first.
+
+        Each result carries a `score`; ties go newest first. `after` is the (score, created_at, id)
+        of the last result on the previous page.
+        """
+        raise NotImplementedError
+
+    async def list_due_tasks(self, due_before=None, due_after=None, project_id=None, status=None,
+                             exclude_project_ids=(), limit=100, after=None) -> list:
+        """Open (not done) tasks with a due date in [due_after, due_before), soonest first.
+
+        `after` is the (due_date, id) of the last task on the previous page.
+        """
+        raise NotImplementedError
+
+    async def list_ranked_tasks(self, project_id: str, status=None, exclude_project_ids=(), limit=1000, after=None,
+                                fields=None) -> list:
+        """A project's tasks in board order: by status, then rank, then id.
+
+        `after` is the (status, rank, id) of the last task on the previous page.
+        """
+        raise NotImplementedError
+
+    async def set_task_ranks(self, ranks: dict) -> int:
+        """Apply {task_id: rank} in one write; return how many tasks were updated."""
+        raise NotImplementedError
+
+    async def backfill_task_ranks(self, rank_for, batch_size=1000) -> int:
+        """Set `rank` to rank_for(task) on tasks stored before ranks existed; return how many.
+
+        New tasks are always stored with a rank, so once a pass completes it is recorded and later calls return 0.
+        """
+        raise NotImplementedError
+
+    async def delete_project_tasks(self, project_id: str, limit: int) -> int:
+        """Delete up to `limit` tasks of a project, live ones first, then archived; return how many were deleted."""
+        raise NotImplementedError
+
+    # Archive
+    async def archive_done_tasks(self, done_before, archived_at, limit: int) -> list:
+        """Move up to `limit` done tasks last updated before `done_before` to the archive.
+
+        Returns the moved tasks as they were. Only one archiver should run at a time.
+        """
+        raise NotImplementedError
+
+    async def get_archived_task(self, task_id: str):
+        raise NotImplementedError
+
+    async def insert_archive_run(self, run: dict):
+        raise NotImplementedError
+
+    async def list_archive_runs(self, limit=20) -> list:
+        """Reports of past archive runs, newest first."""
+        raise NotImplementedError
+
+    async def dashboard_counts(self, exclude_project_ids=(), per_project=False, include_archived=False) -> dict:
+        """Task counters plus the visible project total.
+
+        Returns {"total", "completed", "high_priority", "total_projects", "active_projects"}, where
+        active_projects is a count, or a {project_id: task count} dict when per_project is set.
+        """
+        raise NotImplementedError
+
+    # Projects
+    async def insert_project(self, project: dict):
+        raise NotImplementedError
+
+    async def get_project(self, project_id: str, include_deleting=False):
+        raise NotImplementedError
+
+    async def get_projects_by_ids(self, project_ids: list, include_deleting=False) -> list:
+        raise NotImplementedError
+
+    async def list_projects(self, limit=1000, after=None, fields=None) -> list:
+        raise NotImplementedError
+
+    def iter_projects(self, batch_size=500):
+        raise NotImplementedError
+
+    async def update_project(self, project_id: str, fields: dict):
+        """Apply `fields` to a live project and return the post-image, or None."""
+        raise NotImplementedError
+
+    async def mark_project_deleting(self, project_id: str, updated_at):
+        """Flag a project as being deleted; return its pre-image, or None."""
+        raise NotImplementedError
+
+    async def delete_project(self, project_id: str):
+        raise NotImplementedError
+
+    async def deleting_project_ids(self) -> list:
+        raise NotImplementedError
+
+    # Idempotency keys
+    async def claim_idempotency_key(self, key: str, request_hash: str, now, expires_at, stale_before):
+        """Record `key` as pending and return None, or return the live record holding it.
+
+        Records look like {"key", "request_hash", "state": "pending" | "done", "response", "locked_at",
+        "expires_at"}. An expired record, or one left pending since before `stale_before` (its
+        writer died), is taken over as if it did not exist.
+        """
+        raise NotImplementedError
+
+    async def complete_idempotency_key(self, key: str, response: dict):
+        raise NotImplementedError
+
+    async def release_idempotency_key(self, key: str):
+        """Drop a pending claim so the request can be retried."""
+        raise NotImplementedError
+
+    # Per-project task counters
+    async def inc_project_task_counts(self, deltas: dict):
+        """Apply {project_id: {counter: delta}} to the counters in TASK_COUNT_FIELDS."""
+        raise NotImplementedError
+
+    async def list_project_summaries(self, limit=1000) -> list:
+        """Visible projects as {id, name, color, task_counts}, newest first."""
+        raise NotImplementedError
+
+    async def repair_project_task_counts(self) -> int:
+        """Recompute every project's counters from its tasks; return how many were corrected."""
+        raise NotImplementedError
+
+
+# MongoDB
+TASK_INDEXES = [
+    IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    # Filtered listings sort on the full PAGE_SORT key, so every page is an index walk
+    IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="project_id_created_at_id"),
+    IndexModel([("status", ASCENDING), ("priority", ASCENDING)], name="status_priority"),
+    IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+    IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    IndexModel([(field, TEXT) for field in TASK_TEXT_WEIGHTS], weights=TASK_TEXT_WEIGHTS, name="title_description_text"),
+    # Partial: completed tasks (the bulk of an old collection) never enter it ($in needs MongoDB 6.0+; older
+    # servers skip just this index and due-date reads fall back to the other indexes)
+    IndexModel([("due_date", ASCENDING), ("id", ASCENDING)], name="due_date_open",
+               partialFilterExpression={"due_date": {"$type": "date"}, "status": {"$in": list(OPEN_STATUSES)}}),
+    # Kanban columns in rank order
+    IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("rank", ASCENDING), ("id", ASCENDING)],
+               name="project_status_rank"),
+    # Partial: what the archiver looks for, and nothing else
+    IndexModel([("updated_at", ASCENDING)], name="done_updated_at", partialFilterExpression={"status": STATUS_DONE}),
+]
+
+# Only what archived reads need: by id, and the newest-first listings
+TASK_ARCHIVE_INDEXES = [
+    IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="project_id_created_at_id"),
+    IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+]
+
+# Earlier index names whose keys are a prefix of a current index; dropped once the replacement exists
+SUPERSEDED_INDEXES = {
+    "tasks": {"project_id_created_at": "project_id_created_at_id", "status_created_at": "status_created_at_id"},
+    "tasks_archive": {"project_id_created_at": "project_id_created_at_id"},
+}
+
+ARCHIVE_RUN_INDEXES = [
+    IndexModel([("started_at", DESCENDING)], name="started_at"),
+]
+
+PROJECT_INDEXES = [
+    IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+]
+
+IDEMPOTENCY_INDEXES = [
+    IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+    IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+]
+
+# Completion markers in the migrations collection, keyed by _id
+TASK_RANKS_MIGRATION = "task_ranks"
+
+PAGE_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+COUNTED_FIELDS = {"_id": 0, "status": 1, "priority": 1, "project_id": 1}
+VISIBLE_PROJECTS = {"deleting": {"$ne": True}}
+
+def _after_filter(after) -> dict:
+    created_at, doc_id = after
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": doc_id}},
+    ]}
+
+def _task_filter(project_id=None, status=None, exclude_project_ids=(), after=None) -> dict:
+    filter_dict = {}
+    if project_id:
+        filter_dict["project_id"] = {"$in": []} if project_id in exclude_project_ids else project_id
+    elif exclude_project_ids:
+        filter_dict["project_id"] = {"$nin": list(exclude_project_ids)}
+    if status:
+        filter_dict["status"] = status
+    if after:
+        filter_dict = {"$and": [filter_dict, _after_filter(after)]}
+    return filter_dict
+
+def _search_after_filter(after) -> dict:
+    score, created_at, doc_id = after
+    return {"$or": [
+        {"score": {"$lt": score}},
+        {"score": score, "created_at": {"$lt": created_at}},
+        {"score": score, "created_at": created_at, "id": {"$lt": doc_id}},
+    ]}
+
+def _due_filter(due_before=None, due_after=None, project_id=None, status=None, exclude_project_ids=(), after=None) -> dict:
+    # Must imply the partial filter of due_date_open for the planner to use it
+    due_date = {"$type": "date"}
+    if due_before:
+        due_date["$lt"] = due_before
+    if due_after:
+        due_date["$gte"] = due_after
+    filter_dict = _task_filter(project_id, exclude_project_ids=exclude_project_ids)
+    filter_dict["due_date"] = due_date
+    filter_dict["status"] = status if status else {"$in": list(OPEN_STATUSES)}
+    if after:
+        due, doc_id = after
+        filter_dict["$or"] = [{"due_date": {"$gt": due}}, {"due_date": due, "id": {"$gt": doc_id}}]
+    return filter_dict
+
+def _rank_after_filter(after) -> dict:
+    status, rank, doc_id = after
+    return {"$or": [
+        {"status": {"$gt": status}},
+        {"status": status, "rank": {"$gt": rank}},
+        {"status": status, "rank": rank, "id": {"$gt": doc_id}},
+    ]}
+
+def _projection(fields, default=READ_PROJECTION) -> dict:
+    return {"_id": 0, **dict.fromkeys(fields, 1)} if fields else default
+
+def _facet_count(facet: dict, key: str) -> int:
+    return facet[key][0]["count"] if facet[key] else 0
+
+class MongoStorage(Storage):
+    def __init__(self, mongo_url: str, db_name: str, **client_options):
+        self.client = AsyncIOMotorClient(mongo_url, **client_options)
+        self.db = self.client[db_name]
+
+    async def ensure_indexes(self) -> dict:
+        created = {}
+        for collection, indexes in ((self.db.tasks, TASK_INDEXES), (self.db.projects, PROJECT_INDEXES),
+                                    (self.db.idempotency_keys, IDEMPOTENCY_INDEXES),
+                                    (self.db.tasks_archive, TASK_ARCHIVE_INDEXES), (self.db.archive_runs, ARCHIVE_RUN_INDEXES)):
+            existing = await collection.index_information()
+            built = []
+            for index in indexes:
+                name = index.document["name"]
+                try:
+                    await collection.create_indexes([index])
+                    built.append(name)
+                except OperationFailure as e:
+                    logger.error(f"Could not create index {collection.name}.{name}: {e}")
+            created[collection.name] = [name for name in built if name not in existing]
+            for name, replacement in SUPERSEDED_INDEXES.get(collection.name, {}).items():
+                if name in existing and replacement in built:
+                    await collection.drop_index(name)
+        return created
+
+    async def close(self):
+        self.client.close()
+
+    async def ping(self):
+        await self.client.admin.command("ping")
+
+    async def warm_up(self, connections: int):
+        # Concurrent pings force server selection and check out that many sockets at once
+        await asyncio.gather(*(self.ping() for _ in range(max(connections, 1))))
+
+    async def enable_change_stream_pre_images(self):
+        """Record pre-images so change-stream deletes carry the deleted document (MongoDB 6.0+)."""
+        for name in ("tasks", "projects"):
+            await self.db.command("collMod", name, changeStreamPreAndPostImages={"enabled": True})
+
+    # Tasks
+    async def insert_task(self, task: dict):
+        await self.db.tasks.insert_one(dict(task))
+
+    async def get_task(self, task_id: str):
+        return await self.db.tasks.find_one({"id": task_id}, READ_PROJECTION)
+
+    async def get_tasks_by_ids(self, task_ids: list) -> list:
+        return await self.db.tasks.find({"id": {"$in": list(task_ids)}}, READ_PROJECTION).to_list(None)
+
+    async def list_tasks(self, project_id=None, status=None, exclude_project_ids=(), limit=1000, after=None, fields=None,
+                         include_archived=False) -> list:
+        filter_dict = _task_filter(project_id, status, exclude_project_ids, after)
+        if not include_archived:
+            return await self.db.tasks.find(filter_dict, _projection(fields)).sort(PAGE_SORT).limit(limit).to_list(limit)
+        # Each side is cut to `limit` on its own index before the union is merged
+        page = [{"$match": filter_dict}, {"$sort": dict(PAGE_SORT)}, {"$limit": limit}]
+        pipeline = [
+            *page,
+            {"$unionWith": {"coll": "tasks_archive", "pipeline": page}},
+            {"$sort": dict(PAGE_SORT)},
+            {"$limit": limit},
+            {"$project": _projection(fields)},
+        ]
+        return await self.db.tasks.aggregate(pipeline).to_list(limit)
+
+    async def iter_tasks(self, project_id=None, status=None, exclude_project_ids=(), batch_size=500):
+        filter_dict = _task_filter(project_id, status, exclude_project_ids)
+        async for task in self.db.tasks.find(filter_dict, READ_PROJECTION).sort(PAGE_SORT).batch_size(batch_size):
+            yield task
+
+    async def update_task(self, task_id: str, fields: dict):
+        return await self.db.tasks.find_one_and_update(
+            {"id": task_id}, {"$set": fields}, READ_PROJECTION, return_document=ReturnDocument.BEFORE
+        )
+
+    async def delete_task(self, task_id: str):
+        return await self.db.tasks.find_one_and_delete({"id": task_id}, READ_PROJECTION)
+
+    async def bulk_write_tasks(self, operations: list) -> dict:
+        result = {"inserted": 0, "updated": 0, "deleted": 0, "errors": {}, "previous": {}}
+        inserts = [(index, operation[1]) for index, operation in enumerate(operations) if operation[0] == "insert"]
+        # bulk_write cannot return pre-images, so updates and deletes go out concurrently as
+        # find_one_and_* calls; counters and stats are then derived from what each write replaced
+        targeted = [(index, operation) for index, operation in enumerate(operations) if operation[0] != "insert"]
+
+        async def insert_all():
+            if not inserts:
+                return
+            try:
+                inserted = await self.db.tasks.insert_many([dict(doc) for _, doc in inserts], ordered=False)
+                result["inserted"] = len(inserted.inserted_ids)
+            except BulkWriteError as e:
+                result["inserted"] = e.details["nInserted"]
+                for error in e.details.get("writeErrors", []):
+                    result["errors"][inserts[error["index"]][0]] = error["errmsg"]
+
+        def write_one(operation):
+            if operation[0] == "update":
+                return self.db.tasks.find_one_and_update({"id": operation[1]}, {"$set": operation[2]}, READ_PROJECTION,
+                                                         return_document=ReturnDocument.BEFORE)
+            return self.db.tasks.find_one_and_delete({"id": operation[1]}, READ_PROJECTION)
+
+        _, *pre_images = await asyncio.gather(insert_all(), *(write_one(operation) for _, operation in targeted),
+                                              return_exceptions=True)
+        for (index, operation), pre_image in zip(targeted, pre_images):
+            if isinstance(pre_image, Exception):
+                result["errors"][index] = str(pre_image)
+            elif pre_image is None:
+                result["errors"][index] = "Task not found"
+            else:
+                result["previous"][index] = pre_image
+                result["updated" if operation[0] == "update" else "deleted"] += 1
+        return result
+
+    async def search_tasks(self, query: str, project_id=None, status=None, exclude_project_ids=(), limit=100, after=None) -> list:
+        pipeline = [
+            {"$match": {"$text": {"$search": query}, **_task_filter(project_id, status, exclude_project_ids)}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            *([{"$match": _search_after_filter(after)}] if after else []),
+            {"$sort": {"score": DESCENDING, "created_at": DESCENDING, "id": DESCENDING}},
+            {"$limit": limit},
+            {"$project": READ_PROJECTION},
+        ]
+        return await self.db.tasks.aggregate(pipeline).to_list(limit)
+
+    async def list_due_tasks(self, due_before=None, due_after=None, project_id=None, status=None,
+                             exclude_project_ids=(), limit=100, after=None) -> list:
+        filter_dict = _due_filter(due_before, due_after, project_id, status, exclude_project_ids, after)
+        cursor = self.db.tasks.find(filter_dict, READ_PROJECTION).sort([("due_date", ASCENDING), ("id", ASCENDING)])
+        return await cursor.limit(limit).to_list(limit)
+
+    async def list_ranked_tasks(self, project_id: str, status=None, exclude_project_ids=(), limit=1000, after=None,
+                                fields=None) -> list:
+        filter_dict = _task_filter(project_id, status, exclude_project_ids)
+        if after:
+            filter_dict = {"$and": [filter_dict, _rank_after_filter(after)]}
+        cursor = self.db.tasks.find(filter_dict, _projection(fields))
+        cursor = cursor.sort([("status", ASCENDING), ("rank", ASCENDING), ("id", ASCENDING)])
+        return await cursor.limit(limit).to_list(limit)
+
+    async def set_task_ranks(self, ranks: dict) -> int:
+        if not ranks:
+            return 0
+        writes = [UpdateOne({"id": task_id}, {"$set": {"rank": rank}}) for task_id, rank in ranks.items()]
+        return (await self.db.tasks.bulk_write(writes, ordered=False)).modified_count
+
+    async def backfill_task_ranks(self, rank_for, batch_size=1000) -> int:
+        # The {rank: missing} scan has no index to use; the marker keeps leader elections from repeating it
+        if await self.db.migrations.find_one({"_id": TASK_RANKS_MIGRATION}):
+            return 0
+        # One pass over a single cursor; re-querying {rank: missing} per batch would rescan the collection
+        backfilled = 0
+        writes = []
+        cursor = self.db.tasks.find({"rank": {"$exists": False}}, {"_id": 0, "id": 1, "created_at": 1}, batch_size=batch_size)
+        async for task in cursor:
+            writes.append(UpdateOne({"id": task["id"], "rank": {"$exists": False}}, {"$set": {"rank": rank_for(task)}}))
+            if len(writes) >= batch_size:
+                backfilled += (await self.db.tasks.bulk_write(writes, ordered=False)).modified_count
+                writes = []
+        if writes:
+            backfilled += (await self.db.tasks.bulk_write(writes, ordered=False)).modified_count
+        await self.db.migrations.update_one(
+            {"_id": TASK_RANKS_MIGRATION}, {"$set": {"completed_at": datetime.utcnow(), "backfilled": backfilled}},
+            upsert=True)
+        return backfilled
+
+    async def delete_project_tasks(self, project_id: str, limit: int) -> int:
+        for collection in (self.db.tasks, self.db.tasks_archive):
+            batch = await collection.find({"project_id": project_id}, {"_id": 1}).limit(limit).to_list(limit)
+            if batch:
+                result = await collection.delete_many({"_id": {"$in": [task["_id"] for task in batch]}})
+                return result.deleted_count
+        return 0
+
+    async def archive_done_tasks(self, done_before, archived_at, limit: int) -> list:
+        archivable = {"status": STATUS_DONE, "updated_at": {"$lt": done_before}}
+        batch = await self.db.tasks.find(archivable, READ_PROJECTION).sort("updated_at", ASCENDING).limit(limit).to_list(limit)
+        if not batch:
+            return []
+        # Copy, then delete: an interrupted run leaves copies whose re-insert next time is a duplicate key
+        try:
+            await self.db.tasks_archive.insert_many([{**task, "archived_at": archived_at} for task in batch], ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+        task_ids = [task["id"] for task in batch]
+        await self.db.tasks.delete_many({"id": {"$in": task_ids}, **archivable})
+        # Tasks edited since the read (e.g. reopened) no longer match and stay live; drop their copies
+        still_live = set(await self.db.tasks.distinct("id", {"id": {"$in": task_ids}}))
+        if still_live:
+            await self.db.tasks_archive.delete_many({"id": {"$in": list(still_live)}})
+        return [task for task in batch if task["id"] not in still_live]
+
+    async def get_archived_task(self, task_id: str):
+        return await self.db.tasks_archive.find_one({"id": task_id}, READ_PROJECTION)
+
+    async def insert_archive_run(self, run: dict):
+        await self.db.archive_runs.insert_one(dict(run))
+
+    async def list_archive_runs(self, limit=20) -> list:
+        return await self.db.archive_runs.find({}, READ_PROJECTION).sort("started_at", DESCENDING).limit(limit).to_list(limit)
+
+    async def dashboard_counts(self, exclude_project_ids=(), per_project=False, include_archived=False) -> dict:
+        # Single round trip: $facet over tasks, with the project total pulled in via $lookup
+        active = [{"$match": {"project_id": {"$ne": None}}}, {"$group": {"_id": "$project_id", "count": {"$sum": 1}}}]
+        if not per_project:
+            active.append({"$count": "count"})
+        visible_tasks = _task_filter(exclude_project_ids=exclude_project_ids)
+        match = [{"$match": visible_tasks}] if visible_tasks else []
+        pipeline = [
+            *match,
+            *([{"$unionWith": {"coll": "tasks_archive", "pipeline": [*match, {"$project": COUNTED_FIELDS}]}}]
+              if include_archived else []),
+            {"$facet": {
+                "total": [{"$count": "count"}],
+                "completed": [{"$match": {"status": STATUS_DONE}}, {"$count": "count"}],
+                "high_priority": [{"$match": {"priority": PRIORITY_HIGH, "status": {"$ne": STATUS_DONE}}}, {"$count": "count"}],
+                "active_projects": active,
+            }},
+            {"$lookup": {"from": "projects", "pipeline": [{"$match": VISIBLE_PROJECTS}, {"$count": "count"}], "as": "total_projects"}},
+        ]
+        facet = (await self.db.tasks.aggregate(pipeline).to_list(1))[0]
+        return {
+            "total": _facet_count(facet, "total"),
+            "completed": _facet_count(facet, "completed"),
+            "high_priority": _facet_count(facet, "high_priority"),
+            "total_projects": _facet_count(facet, "total_projects"),
+            "active_projects": ({p["_id"]: p["count"] for p in facet["active_projects"]} if per_project
+                                else _facet_count(facet, "active_projects")),
+        }
+
+    # Projects
+    async def insert_project(self, project: dict):
+        await self.db.projects.insert_one({**project, "task_counts": dict.fromkeys(TASK_COUNT_FIELDS, 0)})
+
+    async def get_project(self, project_id: str, include_deleting=False):
+        filter_dict = {"id": project_id} if include_deleting else {"id": project_id, **VISIBLE_PROJECTS}
+        return await self.db.projects.find_one(filter_dict, PROJECT_READ_PROJECTION)
+
+    async def get_projects_by_ids(self, project_ids: list, include_deleting=False) -> list:
+        filter_dict = {"id": {"$in": list(project_ids)}}
+        if not include_deleting:
+            filter_dict.update(VISIBLE_PROJECTS)
+        return await self.db.projects.find(filter_dict, PROJECT_READ_PROJECTION).to_list(None)
+
+    async def list_projects(self, limit=1000, after=None, fields=None) -> list:
+        filter_dict = {"$and": [VISIBLE_PROJECTS, _after_filter(after)]} if after else VISIBLE_PROJECTS
+        projection = _projection(fields, PROJECT_READ_PROJECTION)
+        return await self.db.projects.find(filter_dict, projection).sort(PAGE_SORT).limit(limit).to_list(limit)
+
+    async def iter_projects(self, batch_size=500):
+        async for project in self.db.projects.find(VISIBLE_PROJECTS, PROJECT_READ_PROJECTION).sort(PAGE_SORT).batch_size(batch_size):
+            yield project
+
+    async def update_project(self, project_id: str, fields: dict):
+        return await self.db.projects.find_one_and_update(
+            {"id": project_id, **VISIBLE_PROJECTS}, {"$set": fields}, PROJECT_READ_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def mark_project_deleting(self, project_id: str, updated_at):
+        return await self.db.projects.find_one_and_update(
+            {"id": project_id}, {"$set": {"deleting": True, "updated_at": updated_at}}, PROJECT_READ_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    async def delete_project(self, project_id: str):
+        await self.db.projects.delete_one({"id": project_id})
+
+    async def deleting_project_ids(self) -> list:
+        return [project["id"] async for project in self.db.projects.find({"deleting": True}, {"id": 1})]
+
+    # Idempotency keys
+    async def claim_idempotency_key(self, key: str, request_hash: str, now, expires_at, stale_before):
+        claim = {"request_hash": request_hash, "state": "pending", "response": None, "locked_at": now, "expires_at": expires_at}
+        try:
+            await self.db.idempotency_keys.insert_one({"key": key, **claim})
+            return None
+        except MongoDuplicateKeyError:
+            pass
+        # The TTL monitor only runs once a minute, so expired records can still be here
+        taken = await self.db.idempotency_keys.find_one_and_update(
+            {"key": key, "$or": [{"expires_at": {"$lte": now}}, {"state": "pending", "locked_at": {"$lt": stale_before}}]},
+            {"$set": claim},
+        )
+        if taken:
+            return None
+        existing = await self.db.idempotency_keys.find_one({"key": key}, {"_id": 0})
+        if existing is None:
+            # Expired and removed in between; claim again
+            return await self.claim_idempotency_key(key, request_hash, now, expires_at, stale_before)
+        return existing
+
+    async def complete_idempotency_key(self, key: str, response: dict):
+        await self.db.idempotency_keys.update_one({"key": key}, {"$set": {"state": "done", "response": response}})
+
+    async def release_idempotency_key(self, key: str):
+        await self.db.idempotency_keys.delete_one({"key": key, "state": "pending"})
+
+    # Per-project task counters
+    async def inc_project_task_counts(self, deltas: dict):
+        writes = [UpdateOne({"id": project_id}, {"$inc": {f"task_counts.{field}": delta for field, delta in counts.items()}})
+                  for project_id, counts in deltas.items()]
+        if writes:
+            await self.db.projects.bulk_write(writes, ordered=False)
+
+    async def list_project_summaries(self, limit=1000) -> list:
+        projection = {"_id": 0, "id": 1, "name": 1, "color": 1, "task_counts": 1}
+        summaries = await self.db.projects.find(VISIBLE_PROJECTS, projection).sort(PAGE_SORT).limit(limit).to_list(limit)
+        for summary in summaries:
+            summary["task_counts"] = {**dict.fromkeys(TASK_COUNT_FIELDS, 0), **summary.get("task_counts", {})}
+        return summaries
+
+    async def repair_project_task_counts(self) -> int:
+        # Read the counters before counting tasks: a task write always commits before its $inc, so any
+        # increment already in `stored` is for a task the aggregation below also sees
+        stored = {project["id"]: project.get("task_counts")
+                  async for project in self.db.projects.find({}, {"_id": 0, "id": 1, "task_counts": 1})}
+        pipeline = [
+            {"$match": {"project_id": {"$ne": None}}},
+            {"$group": {
+                "_id": "$project_id",
+                **{status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+                   for status in TASK_COUNT_FIELDS if status != "high_priority_open"},
+                "high_priority_open": {"$sum": {"$cond": [
+                    {"$and": [{"$eq": ["$priority", PRIORITY_HIGH]}, {"$ne": ["$status", STATUS_DONE]}]}, 1, 0]}},
+            }},
+        ]
+        actual = {row.pop("_id"): row async for row in self.db.tasks.aggregate(pipeline)}
+        writes = []
+        for project_id, task_counts in stored.items():
+            counts = {**dict.fromkeys(TASK_COUNT_FIELDS, 0), **actual.get(project_id, {})}
+            if task_counts != counts:
+                # Compare-and-set: a project whose counters moved since the read keeps its $inc and is
+                # left for the next repair rather than overwritten with a stale count
+                expected = task_counts if task_counts is not None else {"$exists": False}
+                writes.append(UpdateOne({"id": project_id, "task_counts": expected}, {"$set": {"task_counts": counts}}))
+        if not writes:
+            return 0
+        return (await self.db.projects.bulk_write(writes, ordered=False)).modified_count
+
+
+# In-process engine
+def _only(docs, fields):
+    if not fields:
+        return list(docs)
+    return [{field: doc[field] for field in fields if field in doc} for doc in docs]
+
+def _tokenize(text) -> list:
+    return re.findall(r"\w+", text.lower()) if text else []
+
+class MemoryTextIndex:
+    """Inverted index for search_tasks: token -> {doc id: precomputed score contribution}.
+
+    Scoring follows the shape of Mongo's textScore (field weight, damped by how much of the field
+    the term makes up) but without stemming or stop words, so scores are comparable, not equal.
+    """
+
+    def __init__(self, weights: dict):
+        self.weights = weights
+        self.postings = defaultdict(dict)
+
+    def _contributions(self, doc) -> dict:
+        contributions = Counter()
+        for field, weight in self.weights.items():
+            tokens = _tokenize(doc.get(field))
+            for token, count in Counter(tokens).items():
+                contributions[token] += weight * (0.5 + 0.5 * count / len(tokens))
+        return contributions
+
+    def add(self, doc):
+        for token, score in self._contributions(doc).items():
+            self.postings[token][doc["id"]] = score
+
+    def remove(self, doc):
+        for token in self._contributions(doc):
+            posting = self.postings[token]
+            posting.pop(doc["id"], None)
+            if not posting:
+                del self.postings[token]
+
+    def scores(self, query: str) -> Counter:
+        """Sum the contributions of every query term; only documents sharing a term are touched."""
+        scores = Counter()
+        for token in set(_tokenize(query)):
+            for doc_id, score in self.postings.get(token, {}).items():
+                scores[doc_id] += score
+        return scores
+
+class MemoryTable:
+    """Documents keyed by id, with hash indexes on `hash_fields` and a sorted (created_at, id) index.
+
+    `sorted_indexes` adds named sorted indexes: {name: key function}, where the function returns
+    the sort key for a document, or None to leave it out (a partial index).
+    """
+
+    def __init__(self, hash_fields=(), text_weights=None, sorted_indexes=None):
+        self.docs = {}
+        self.hash_indexes = {field: defaultdict(set) for field in hash_fields}
+        self.created_index = []
+        self.text_index = MemoryTextIndex(text_weights) if text_weights else None
+        self.sorted_keys = sorted_indexes or {}
+        self.sorted_indexes = {name: [] for name in self.sorted_keys}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def get(self, doc_id):
+        doc = self.docs.get(doc_id)
+        return dict(doc) if doc is not None else None
+
+    def insert(self, doc: dict):
+        if doc["id"] in self.docs:
+            raise DuplicateKeyError(f"Duplicate id: {doc['id']}")
+        doc = stored_form(doc)
+        self.docs[doc["id"]] = doc
+        self._index(doc)
+
+    def update(self, doc_id, fields: dict):
+        """Apply fields in place and return the pre-image, or None."""
+        doc = self.docs.get(doc_id)
+        if doc is None:
+            return None
+        before = dict(doc)
+        self._unindex(doc)
+        doc.update({k: _plain(v) for k, v in fields.items()})
+        self._index(doc)
+        return before
+
+    def delete(self, doc_id):
+        doc = self.docs.pop(doc_id, None)
+        if doc is not None:
+            self._unindex(doc)
+        return doc
+
+    def ids_where(self, field, value) -> set:
+        return self.hash_indexes[field].get(_plain(value), set())
+
+    def scan(self, equals=None, exclude=None, predicate=None, limit=None, after=None):
+        """Yield matching docs newest first.
+
+        equals: {hash field: value}; exclude: {hash field: values to skip}. Small candidate sets from
+        the hash indexes are sorted and walked newest first; otherwise the created_at index is walked
+        from `after`. Either way filtering happens during the walk, so `limit` counts matches only.
+        """
+        equals, exclude = equals or {}, exclude or {}
+        exclude = {field: {_plain(v) for v in values} for field, values in exclude.items()}
+        matches = lambda doc: (all(doc.get(f) not in values for f, values in exclude.items())
+                               and (predicate is None or predicate(doc)))
+        if equals:
+            candidate_sets = sorted((self.ids_where(f, v) for f, v in equals.items()), key=len)
+            candidates = candidate_sets[0].intersection(*candidate_sets[1:]) if len(candidate_sets) > 1 else candidate_sets[0]
+            if len(candidates) * 4 < len(self.docs):
+                keys = ((self.docs[i]["created_at"], i) for i in candidates)
+                if after:
+                    keys = (key for key in keys if key < after)
+                docs = (self.docs[doc_id] for _, doc_id in sorted(keys, reverse=True))
+                for doc in islice(filter(matches, docs), limit):
+                    yield dict(doc)
+                return
+            in_candidates = candidates.__contains__
+        else:
+            in_candidates = None
+
+        position = bisect_left(self.created_index, after) if after else len(self.created_index)
+        found = 0
+        for index in range(position - 1, -1, -1):
+            if limit is not None and found >= limit:
+                return
+            doc_id = self.created_index[index][1]
+            if in_candidates is not None and not in_candidates(doc_id):
+                continue
+            doc = self.docs[doc_id]
+            if matches(doc):
+                found += 1
+                yield dict(doc)
+
+    def _index(self, doc):
+        for field, index in self.hash_indexes.items():
+            index[doc.get(field)].add(doc["id"])
+        insort(self.created_index, (doc["created_at"], doc["id"]))
+        if self.text_index:
+            self.text_index.add(doc)
+        for name, key_of in self.sorted_keys.items():
+            key = key_of(doc)
+            if key is not None:
+                insort(self.sorted_indexes[name], key)
+
+    def _unindex(self, doc):
+        for field, index in self.hash_indexes.items():
+            ids = index[doc.get(field)]
+            ids.discard(doc["id"])
+            if not ids:
+                del index[doc.get(field)]
+        position = bisect_left(self.created_index, (doc["created_at"], doc["id"]))
+        del self.created_index[position]
+        if self.text_index:
+            self.text_index.remove(doc)
+        for name, key_of in self.sorted_keys.items():
+            key = key_of(doc)
+            if key is not None:
+                index = self.sorted_indexes[name]
+                del index[bisect_left(index, key)]
+
+class MemoryStorage(Storage):
+    def __init__(self):
+        self.tasks = MemoryTable(
+            hash_fields=("project_id", "status", "priority"),
+            text_weights=TASK_TEXT_WEIGHTS,
+            sorted_indexes={"due_open": self._due_key, "board": self._board_key, "done_updated": self._done_key},
+        )
+        self.tasks_archive = MemoryTable(hash_fields=("project_id", "status", "priority"))
+        self.archive_runs = []
+        self.projects = MemoryTable()
+        # Kept beside the project documents so they never show up in project reads
+        self.project_task_counts = defaultdict(Counter)
+        # Ordered by last claim, which is also expiry order while the TTL is constant
+        self.idempotency_keys = OrderedDict()
+        # Names of one-off data migrations that have completed
+        self.migrations = set()
+
+    async def ensure_indexes(self) -> dict:
+        # Indexes are maintained on every write
+        return {"tasks": [], "projects": [], "idempotency_keys": [], "tasks_archive": [], "archive_runs": []}
+
+    # Tasks
+    def _scan_tasks(self, project_id=None, status=None, exclude_project_ids=(), limit=None, after=None, table=None):
+        if project_id and project_id in exclude_project_ids:
+            return iter(())
+        equals = {}
+        if project_id:
+            equals["project_id"] = project_id
+        if status:
+            equals["status"] = status
+        exclude = {"project_id": set(exclude_project_ids)} if exclude_project_ids and not project_id else None
+        return (table or self.tasks).scan(equals=equals, exclude=exclude, limit=limit, after=after)
+
+    async def insert_task(self, task: dict):
+        self.tasks.insert(task)
+
+    async def get_task(self, task_id: str):
+        return self.tasks.get(task_id)
+
+    async def get_tasks_by_ids(self, task_ids: list) -> list:
+        return [task for task in map(self.tasks.get, task_ids) if task is not None]
+
+    async def list_tasks(self, project_id=None, status=None, exclude_project_ids=(), limit=1000, after=None, fields=None,
+                         include_archived=False) -> list:
+        tasks = self._scan_tasks(project_id, status, exclude_project_ids, limit, after)
+        if include_archived:
+            archived = self._scan_tasks(project_id, status, exclude_project_ids, limit, after, table=self.tasks_archive)
+            merged = heapq.merge(tasks, archived, key=lambda task: (task["created_at"], task["id"]), reverse=True)
+            tasks = (task for task, _ in zip(merged, range(limit)))
+        return _only(tasks, fields)
+
+    async def iter_tasks(self, project_id=None, status=None, exclude_project_ids=(), batch_size=500):
+        # Page by keyset so concurrent writes between batches cannot skip or repeat documents
+        after = None
+        while True:
+            batch = list(self._scan_tasks(project_id, status, exclude_project_ids, batch_size, after))
+            for task in batch:
+                yield task
+            if len(batch) < batch_size:
+                return
+            after = (batch[-1]["created_at"], batch[-1]["id"])
+
+    async def update_task(self, task_id: str, fields: dict):
+        return self.tasks.update(task_id, fields)
+
+    async def delete_task(self, task_id: str):
+        return self.tasks.delete(task_id)
+
+    async def bulk_write_tasks(self, operations: list) -> dict:
+        result = {"inserted": 0, "updated": 0, "deleted": 0, "errors": {}, "previous": {}}
+        for index, operation in enumerate(operations):
+            if operation[0] == "insert":
+                try:
+                    self.tasks.insert(operation[1])
+                    result["inserted"] += 1
+                except DuplicateKeyError as e:
+                    result["errors"][index] = str(e)
+                continue
+            if operation[0] == "update":
+                pre_image = self.tasks.update(operation[1], operation[2])
+            else:
+                pre_image = self.tasks.delete(operation[1])
+            if pre_image is None:
+                result["errors"][index] = "Task not found"
+            else:
+                result["previous"][index] = pre_image
+                result["updated" if operation[0] == "update" else "deleted"] += 1
+        return result
+
+    async def search_tasks(self, query: str, project_id=None, status=None, exclude_project_ids=(), limit=100, after=None) -> list:
+        status = _plain(status)
+        keys = []
+        for task_id, score in self.tasks.text_index.scores(query).items():
+            task = self.tasks.docs[task_id]
+            if ((project_id and task.get("project_id") != project_id)
+                    or (status and task.get("status") != status)
+                    or task.get("project_id") in exclude_project_ids):
+                continue
+            key = (score, task["created_at"], task_id)
+            if after is None or key < after:
+                keys.append(key)
+        return [{**self.tasks.get(task_id), "score": score} for score, _, task_id in heapq.nlargest(limit, keys)]
+
+    @staticmethod
+    def _due_key(task):
+        # Mirrors the partial due_date_open index: open tasks with a due date only
+        if task.get("due_date") is None or task.get("status") == STATUS_DONE:
+            return None
+        return (task["due_date"], task["id"])
+
+    async def list_due_tasks(self, due_before=None, due_after=None, project_id=None, status=None,
+                             exclude_project_ids=(), limit=100, after=None) -> list:
+        index = self.tasks.sorted_indexes["due_open"]
+        due_before, due_after, status = _plain(due_before), _plain(due_after), _plain(status)
+        if after:
+            position = bisect_right(index, tuple(after))
+        else:
+            position = bisect_left(index, (due_after,)) if due_after else 0
+        tasks = []
+        for due_date, task_id in (index[i] for i in range(position, len(index))):
+            if len(tasks) >= limit or (due_before and due_date >= due_before):
+                break
+            task = self.tasks.docs[task_id]
+            if ((project_id and task.get("project_id") != project_id)
+                    or (status and task.get("status") != status)
+                    or task.get("project_id") in exclude_project_ids):
+                continue
+            tasks.append(dict(task))
+        return tasks
+
+    @staticmethod
+    def _board_key(task):
+        # Mirrors project_status_rank; tasks outside a project are on no board
+        if task.get("project_id") is None:
+            return None
+        return (task["project_id"], task.get("status"), task.get("rank") or "", task["id"])
+
+    async def list_ranked_tasks(self, project_id: str, status=None, exclude_project_ids=(), limit=1000, after=None,
+                                fields=None) -> list:
+        if project_id in exclude_project_ids:
+            return []
+        index = self.tasks.sorted_indexes["board"]
+        status = _plain(status)
+        if after:
+            position = bisect_right(index, (project_id, *after))
+        else:
+            position = bisect_left(index, (project_id, status) if status else (project_id,))
+        tasks = []
+        for key in (index[i] for i in range(position, len(index))):
+            if len(tasks) >= limit or key[0] != project_id or (status and key[1] != status):
+                break
+            tasks.append(dict(self.tasks.docs[key[3]]))
+        return _only(tasks, fields)
+
+    async def set_task_ranks(self, ranks: dict) -> int:
+        return sum(self.tasks.update(task_id, {"rank": rank}) is not None for task_id, rank in ranks.items())
+
+    async def backfill_task_ranks(self, rank_for, batch_size=1000) -> int:
+        if TASK_RANKS_MIGRATION in self.migrations:
+            return 0
+        unranked = [task for task in self.tasks.docs.values() if task.get("rank") is None]
+        for task in unranked:
+            self.tasks.update(task["id"], {"rank": rank_for(task)})
+        self.migrations.add(TASK_RANKS_MIGRATION)
+        return len(unranked)
+
+    async def delete_project_tasks(self, project_id: str, limit: int) -> int:
+        for table in (self.tasks, self.tasks_archive):
+            batch = list(table.ids_where("project_id", project_id))[:limit]
+            if batch:
+                for task_id in batch:
+                    table.delete(task_id)
+                return len(batch)
+        return 0
+
+    @staticmethod
+    def _done_key(task):
+        # Mirrors the partial done_updated_at index
+        if task.get("status") != STATUS_DONE:
+            return None
+        return (task["updated_at"], task["id"])
+
+    async def archive_done_tasks(self, done_before, archived_at, limit: int) -> list:
+        done_before = _plain(done_before)
+        index = self.tasks.sorted_indexes["done_updated"]
+        keys = index[:min(bisect_left(index, (done_before,)), limit)]
+        batch = []
+        for _, task_id in keys:
+            task = self.tasks.delete(task_id)
+            self.tasks_archive.insert({**task, "archived_at": archived_at})
+            batch.append(task)
+        return batch
+
+    async def get_archived_task(self, task_id: str):
+        return self.tasks_archive.get(task_id)
+
+    async def insert_archive_run(self, run: dict):
+        self.archive_runs.append(dict(run))
+
+    async def list_archive_runs(self, limit=20) -> list:
+        return [dict(run) for run in reversed(self.archive_runs[-limit:])]
+
+    async def dashboard_counts(self, exclude_project_ids=(), per_project=False, include_archived=False) -> dict:
+        # Counts come straight off the hash indexes, minus the tasks of hidden projects
+        total = completed = high_priority = 0
+        project_counts = Counter()
+        for table in (self.tasks, self.tasks_archive) if include_archived else (self.tasks,):
+            table_total = len(table)
+            done_ids = table.ids_where("status", STATUS_DONE)
+            table_completed = len(done_ids)
+            table_high_priority = len(table.ids_where("priority", PRIORITY_HIGH) - done_ids)
+            for project_id in exclude_project_ids:
+                hidden = table.ids_where("project_id", project_id)
+                table_total -= len(hidden)
+                table_completed -= len(hidden & done_ids)
+                table_high_priority -= len(hidden & table.ids_where("priority", PRIORITY_HIGH) - done_ids)
+            total += table_total
+            completed += table_completed
+            high_priority += table_high_priority
+            project_counts.update({
+                project_id: len(ids) for project_id, ids in table.hash_indexes["project_id"].items()
+                if project_id is not None and project_id not in exclude_project_ids
+            })
+        return {
+            "total": total,
+            "completed": completed,
+            "high_priority": high_priority,
+            "total_projects": sum(1 for p in self.projects.docs.values() if not p.get("deleting")),
+            "active_projects": dict(project_counts) if per_project else len(project_counts),
+        }
+
+    # Projects
+    @staticmethod
+    def _visible(project):
+        return not project.get("deleting")
+
+    async def insert_project(self, project: dict):
+        self.projects.insert(project)
+
+    async def get_project(self, project_id: str, include_deleting=False):
+        project = self.projects.get(project_id)
+        if project is None or (not include_deleting and not self._visible(project)):
+            return None
+        return project
+
+    async def get_projects_by_ids(self, project_ids: list, include_deleting=False) -> list:
+        projects = [project for project in map(self.projects.get, project_ids) if project is not None]
+        return projects if include_deleting else [project for project in projects if self._visible(project)]
+
+    async def list_projects(self, limit=1000, after=None, fields=None) -> list:
+        return _only(self.projects.scan(predicate=self._visible, limit=limit, after=after), fields)
+
+    async def iter_projects(self, batch_size=500):
+        after = None
+        while True:
+            batch = await self.list_projects(batch_size, after)
+            for project in batch:
+                yield project
+            if len(batch) < batch_size:
+                return
+            after = (batch[-1]["created_at"], batch[-1]["id"])
+
+    async def update_project(self, project_id: str, fields: dict):
+        if await self.get_project(project_id) is None:
+            return None
+        self.projects.update(project_id, fields)
+        return self.projects.get(project_id)
+
+    async def mark_project_deleting(self, project_id: str, updated_at):
+        return self.projects.update(project_id, {"deleting": True, "updated_at": updated_at})
+
+    async def delete_project(self, project_id: str):
+        self.projects.delete(project_id)
+        self.project_task_counts.pop(project_id, None)
+
+    async def deleting_project_ids(self) -> list:
+        return [p["id"] for p in self.projects.docs.values() if p.get("deleting")]
+
+    # Idempotency keys
+    async def claim_idempotency_key(self, key: str, request_hash: str, now, expires_at, stale_before):
+        while self.idempotency_keys and next(iter(self.idempotency_keys.values()))["expires_at"] <= now:
+            self.idempotency_keys.popitem(last=False)
+        existing = self.idempotency_keys.get(key)
+        if existing and not (existing["state"] == "pending" and existing["locked_at"] < stale_before):
+            return dict(existing)
+        self.idempotency_keys[key] = {"key": key, "request_hash": request_hash, "state": "pending", "response": None,
+                                      "locked_at": now, "expires_at": expires_at}
+        self.idempotency_keys.move_to_end(key)
+        return None
+
+    async def complete_idempotency_key(self, key: str, response: dict):
+        record = self.idempotency_keys.get(key)
+        if record:
+            record.update(state="done", response=dict(response))
+
+    async def release_idempotency_key(self, key: str):
+        record = self.idempotency_keys.get(key)
+        if record and record["state"] == "pending":
+            del self.idempotency_keys[key]
+
+    # Per-project task counters
+    def _task_counts(self, project_id) -> dict:
+        counts = self.project_task_counts.get(project_id, {})
+        return {field: counts.get(field, 0) for field in TASK_COUNT_FIELDS}
+
+    async def inc_project_task_counts(self, deltas: dict):
+        for project_id, counts in deltas.items():
+            if project_id in self.projects.docs:
+                self.project_task_counts[project_id].update(counts)
+
+    async def list_project_summaries(self, limit=1000) -> list:
+        return [{"id": p["id"], "name": p["name"], "color": p["color"], "task_counts": self._task_counts(p["id"])}
+                for p in self.projects.scan(predicate=self._visible, limit=limit)]
+
+    async def repair_project_task_counts(self) -> int:
+        repaired = 0
+        done_ids = self.tasks.ids_where("status", STATUS_DONE)
+        high_ids = self.tasks.ids_where("priority", PRIORITY_HIGH)
+        for project_id in list(self.projects.docs):
+            task_ids = self.tasks.ids_where("project_id", project_id)
+            actual = Counter({status: len(task_ids & self.tasks.ids_where("status", status))
+                              for status in TASK_COUNT_FIELDS if status != "high_priority_open"})
+            actual["high_priority_open"] = len(task_ids & high_ids - done_ids)
+            if self._task_counts(project_id) != {field: actual[field] for field in TASK_COUNT_FIELDS}:
+                self.project_task_counts[project_id] = actual
+                repaired += 1
+        return repaired
+
+
+def create_storage(backend: str, mongo_url: str = None, db_name: str = None, **client_options) -> Storage:
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "mongo":
+        return MongoStorage(mongo_url, db_name, **client_options)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
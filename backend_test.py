@@ -218,7 +218,7 @@ class TodoAPITester:
     def test_delete_project(self, project_id):
         """Test deleting a project"""
         response = requests.delete(f"{self.base_url}/projects/{project_id}")
-        assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+        assert response.status_code == 202, f"Expected status code 202, got {response.status_code}"
         data = response.json()
         assert "message" in data, "Response missing 'message' field"
         
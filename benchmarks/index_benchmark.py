@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Seed N tasks and compare per-endpoint latency with and without the startup indexes.
+
+Runs the FastAPI app in-process (httpx ASGI transport) against the Mongo instance
+configured in backend/.env, using a throwaway database so real data is untouched.
+
+    python benchmarks/index_benchmark.py --tasks 200000 --requests 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+from server import Project, Task, TaskPriority, TaskStatus  # noqa: E402
+from storage import MongoStorage  # noqa: E402
+
+
+async def seed(db, num_tasks, num_projects, batch_size=5000):
+    projects = [Project(name=f"Project {i}").dict() for i in range(num_projects)]
+    await db.projects.insert_many(projects)
+    project_ids = [p["id"] for p in projects]
+
+    task_ids = []
+    batch = []
+    for i in range(num_tasks):
+        task = Task(
+            title=f"Task {i}",
+            status=random.choice(list(TaskStatus)),
+            priority=random.choice(list(TaskPriority)),
+            project_id=random.choice(project_ids),
+        ).dict()
+        batch.append(task)
+        task_ids.append(task["id"])
+        if len(batch) >= batch_size:
+            await db.tasks.insert_many(batch)
+            batch = []
+    if batch:
+        await db.tasks.insert_many(batch)
+    return project_ids, task_ids
+
+
+def endpoints(project_ids, task_ids):
+    return {
+        "GET /tasks/{id}": lambda: ("GET", f"/api/tasks/{random.choice(task_ids)}", None),
+        "PUT /tasks/{id}": lambda: ("PUT", f"/api/tasks/{random.choice(task_ids)}", {"status": random.choice(list(TaskStatus)).value}),
+        "GET /tasks?project_id": lambda: ("GET", f"/api/tasks?project_id={random.choice(project_ids)}", None),
+        "GET /tasks?status": lambda: ("GET", f"/api/tasks?status={random.choice(list(TaskStatus)).value}", None),
+        "GET /projects/{id}": lambda: ("GET", f"/api/projects/{random.choice(project_ids)}", None),
+        "GET /projects/{id}/tasks": lambda: ("GET", f"/api/projects/{random.choice(project_ids)}/tasks", None),
+        "GET /stats": lambda: ("GET", "/api/stats", None),
+    }
+
+
+async def measure(client, make_request, num_requests):
+    latencies = []
+    for _ in range(num_requests):
+        method, url, body = make_request()
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, f"{method} {url} -> {response.status_code}"
+    return statistics.median(latencies)
+
+
+async def run_round(client, routes, num_requests):
+    return {name: await measure(client, make_request, num_requests) for name, make_request in routes.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=30, help="requests per endpoint per round")
+    parser.add_argument("--db-name", default="todo_index_benchmark")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database")
+    args = parser.parse_args()
+
+    storage = MongoStorage(os.environ["MONGO_URL"], args.db_name)
+    server.storage = storage
+    db = storage.db
+    await storage.client.drop_database(args.db_name)
+
+    print(f"🌱 Seeding {args.tasks} tasks across {args.projects} projects into '{args.db_name}'...")
+    start = time.perf_counter()
+    project_ids, task_ids = await seed(db, args.tasks, args.projects)
+    print(f"   done in {time.perf_counter() - start:.1f}s")
+
+    routes = endpoints(project_ids, task_ids)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await db.tasks.drop_indexes()
+        await db.projects.drop_indexes()
+        without = await run_round(client, routes, args.requests)
+
+        created = await storage.ensure_indexes()
+        print(f"📇 Created indexes: {created}")
+        with_indexes = await run_round(client, routes, args.requests)
+
+    print(f"\n{'endpoint':<28}{'no index (ms)':>16}{'indexed (ms)':>16}{'speedup':>10}")
+    for name in routes:
+        before, after = without[name], with_indexes[name]
+        print(f"{name:<28}{before:>16.2f}{after:>16.2f}{before / after:>9.1f}x")
+
+    if not args.keep:
+        await storage.client.drop_database(args.db_name)
+    await storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
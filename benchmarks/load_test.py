@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Drive a concurrent mixed workload against a running API and report per-endpoint latency.
+
+Where backend_test.py checks behaviour one request at a time, this measures it: seed projects and
+tasks through the API, then run --concurrency async clients for --duration seconds, each picking
+list / detail / create / update / stats / delete requests according to --mix. Reports p50, p95
+and p99 latency plus throughput per endpoint, and writes the run to JSON (tagged with the current
+commit) so runs can be compared with --compare.
+
+By default a local server (backend/serve.py) is started on the in-memory backend; with --storage
+mongo it runs in a throwaway database, dropped afterwards. Pass --base-url to target an already
+running server instead (seeded projects and their tasks are deleted afterwards unless --keep is
+given).
+
+    python benchmarks/load_test.py --tasks 20000 --concurrency 100 --duration 30
+    python benchmarks/load_test.py --storage mongo --compare benchmarks/results/load-abc1234.json
+    python benchmarks/load_test.py --base-url http://localhost:8001 --mix list=50,detail=50
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+ROOT = Path(__file__).resolve().parent.parent
+BULK_CHUNK = 1000  # BULK_MAX_OPERATIONS in server.py
+DEFAULT_MIX = "list=30,detail=30,create=10,update=15,stats=10,delete=5"
+STATUSES = ("todo", "in_progress", "done")
+PRIORITIES = ("low", "medium", "high")
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in WORKLOAD:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix; choose from {', '.join(WORKLOAD)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def throwaway_database(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+def drop_database(db_name: str):
+    # Same MONGO_URL the server reads
+    load_dotenv(ROOT / "backend" / ".env")
+    MongoClient(os.environ["MONGO_URL"]).drop_database(db_name)
+
+
+async def start_server(storage: str, workers: int, db_name: str = None):
+    """Launch backend/serve.py on a free port; `db_name` overrides DB_NAME from backend/.env."""
+    port = free_port()
+    env = {**os.environ, "STORAGE_BACKEND": storage}
+    if db_name:
+        env["DB_NAME"] = db_name
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT / "backend", env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                if (await client.get("/api/")).status_code == 200:
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None:
+                raise SystemExit("server exited during startup")
+            await asyncio.sleep(0.1)
+    process.terminate()
+    raise SystemExit("server did not become ready within 10s")
+
+
+def random_task(project_ids, i):
+    return {
+        "title": f"Load test task {i}",
+        "description": f"Seeded task number {i}",
+        "priority": random.choice(PRIORITIES),
+        "project_id": random.choice(project_ids),
+    }
+
+
+async def seed(client, num_projects, num_tasks):
+    responses = await asyncio.gather(*(
+        client.post("/api/projects", json={"name": f"Load test project {i}"}) for i in range(num_projects)
+    ))
+    project_ids = [response.raise_for_status().json()["id"] for response in responses]
+
+    async def bulk_create(start):
+        operations = [{"op": "create", "data": random_task(project_ids, i)}
+                      for i in range(start, min(start + BULK_CHUNK, num_tasks))]
+        response = (await client.post("/api/tasks/bulk", json={"operations": operations})).raise_for_status()
+        return [result["id"] for result in response.json()["results"] if result["ok"]]
+
+    task_ids = []
+    for created in await asyncio.gather(*(bulk_create(start) for start in range(0, num_tasks, BULK_CHUNK))):
+        task_ids.extend(created)
+    return project_ids, task_ids
+
+
+class Workload:
+    """Shared id pools; seeded tasks are never deleted, so detail/update never race a delete."""
+
+    def __init__(self, project_ids, task_ids):
+        self.project_ids = project_ids
+        self.task_ids = task_ids
+        self.created_ids = []
+        self.counter = 0
+
+    async def list(self, client):
+        return await client.get("/api/tasks", params={"project_id": random.choice(self.project_ids), "limit": 100})
+
+    async def detail(self, client):
+        return await client.get(f"/api/tasks/{random.choice(self.task_ids)}")
+
+    async def create(self, client):
+        self.counter += 1
+        response = await client.post("/api/tasks", json=random_task(self.project_ids, f"run-{self.counter}"))
+        if response.status_code == 200:
+            self.created_ids.append(response.json()["id"])
+        return response
+
+    async def update(self, client):
+        body = {"status": random.choice(STATUSES), "priority": random.choice(PRIORITIES)}
+        return await client.put(f"/api/tasks/{random.choice(self.task_ids)}", json=body)
+
+    async def stats(self, client):
+        return await client.get("/api/stats")
+
+    async def delete(self, client):
+        if not self.created_ids:
+            return None
+        task_id = self.created_ids.pop(random.randrange(len(self.created_ids)))
+        return await client.delete(f"/api/tasks/{task_id}")
+
+
+WORKLOAD = {
+    "list": "GET /api/tasks?project_id&limit",
+    "detail": "GET /api/tasks/{id}",
+    "create": "POST /api/tasks",
+    "update": "PUT /api/tasks/{id}",
+    "stats": "GET /api/stats",
+    "delete": "DELETE /api/tasks/{id}",
+}
+
+
+async def run_load(client, workload, weights, concurrency, duration):
+    names, name_weights = list(weights), list(weights.values())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            name = random.choices(names, name_weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(workload, name)(client)
+            except httpx.HTTPError:
+                response = False
+            if response is None:
+                continue  # nothing to delete yet
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            if response is False or response.status_code >= 400:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed)
+
+
+def summarize(latencies, errors, elapsed):
+    def stats(values, error_count):
+        values = sorted(values)
+        if not values:
+            return {"requests": 0, "errors": error_count}
+        return {
+            "requests": len(values),
+            "errors": error_count,
+            "throughput_rps": round(len(values) / elapsed, 1),
+            "mean_ms": round(statistics.mean(values), 2),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(values[-1], 2),
+        }
+
+    endpoints = {name: {"route": WORKLOAD[name], **stats(values, errors[name])} for name, values in latencies.items()}
+    everything = [value for values in latencies.values() for value in values]
+    return {"elapsed_s": round(elapsed, 2), "endpoints": endpoints, "total": stats(everything, sum(errors.values()))}
+
+
+def print_report(result, previous=None):
+    header = f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+    if previous:
+        header += f"{'Δ p95':>9}{'Δ req/s':>9}"
+    print(header)
+    rows = {**result["endpoints"], "total": result["total"]}
+    before_rows = {**previous["endpoints"], "total": previous["total"]} if previous else {}
+    for name, row in rows.items():
+        if not row["requests"]:
+            print(f"{name:<10}{0:>10}{row['errors']:>8}")
+            continue
+        line = (f"{name:<10}{row['requests']:>10}{row['errors']:>8}{row['throughput_rps']:>10.0f}"
+                f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+        before = before_rows.get(name)
+        if before and before.get("requests"):
+            line += (f"{(row['p95_ms'] / before['p95_ms'] - 1) * 100:>+8.0f}%"
+                     f"{(row['throughput_rps'] / before['throughput_rps'] - 1) * 100:>+8.0f}%")
+        print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="target a running server instead of starting one")
+    parser.add_argument("--storage", choices=("memory", "mongo"), default="memory",
+                        help="STORAGE_BACKEND for the local server (mongo reads MONGO_URL/DB_NAME from backend/.env)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the local server (needs --storage mongo)")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of mixed load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint=weight pairs (default {DEFAULT_MIX})")
+    parser.add_argument("--output", type=Path, help="results file (default benchmarks/results/load-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="previous results file to diff against")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded data on an external server")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    process = db_name = None
+    base_url = args.base_url
+    if not base_url:
+        # Keep the seeded data out of the configured database
+        db_name = throwaway_database("load_test") if args.storage == "mongo" else None
+        process, base_url = await start_server(args.storage, args.workers, db_name)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            print(f"🌱 Seeding {args.tasks} tasks across {args.projects} projects on {base_url}...")
+            start = time.perf_counter()
+            project_ids, task_ids = await seed(client, args.projects, args.tasks)
+            seed_seconds = time.perf_counter() - start
+            print(f"   done in {seed_seconds:.1f}s")
+
+            print(f"🏃 {args.concurrency} concurrent clients for {args.duration:.0f}s, mix {args.mix}\n")
+            result = await run_load(client, Workload(project_ids, task_ids), weights, args.concurrency, args.duration)
+
+            if args.base_url and not args.keep:
+                await asyncio.gather(*(client.delete(f"/api/projects/{project_id}") for project_id in project_ids))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        if db_name:
+            drop_database(db_name)
+
+    commit = current_commit()
+    result = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "target": {"base_url": args.base_url or "local", "storage": None if args.base_url else args.storage,
+                   "workers": None if args.base_url else args.workers},
+        "params": {"projects": args.projects, "tasks": args.tasks, "concurrency": args.concurrency,
+                   "duration_s": args.duration, "mix": weights},
+        "seed_s": round(seed_seconds, 2),
+        **result,
+    }
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(result, previous)
+
+    output = args.output or ROOT / "benchmarks" / "results" / f"load-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"\n💾 Saved {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
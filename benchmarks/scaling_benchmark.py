@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Measure how list and update throughput scale with the number of worker processes.
+
+For each worker count in --workers, starts backend/serve.py on the Mongo backend in a fresh
+throwaway database (dropped afterwards, so every count runs on the same amount of data), seeds it
+through the API and runs the load_test.py workload
+restricted to task list and update requests. Prints throughput and p95 per worker count, with the
+speedup over the first, and writes the run to benchmarks/results/scaling-<commit>.json.
+
+    python benchmarks/scaling_benchmark.py --workers 1,2,4,8 --concurrency 200 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import httpx
+
+from load_test import (ROOT, Workload, current_commit, drop_database, parse_mix, run_load, seed, start_server,
+                       throwaway_database)
+
+
+async def measure(workers, args, weights):
+    db_name = throwaway_database("scaling_benchmark")
+    process, base_url = await start_server("mongo", workers, db_name)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            project_ids, task_ids = await seed(client, args.projects, args.tasks)
+            result = await run_load(client, Workload(project_ids, task_ids), weights, args.concurrency, args.duration)
+    finally:
+        process.terminate()
+        process.wait()
+        drop_database(db_name)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load per worker count")
+    parser.add_argument("--mix", default="list=70,update=30", help="endpoint=weight pairs (list and update)")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+    worker_counts = [int(count) for count in args.workers.split(",")]
+
+    runs = []
+    for workers in worker_counts:
+        print(f"🏃 {workers} worker(s): {args.concurrency} clients for {args.duration:.0f}s, mix {args.mix}")
+        start = time.perf_counter()
+        result = await measure(workers, args, weights)
+        runs.append({"workers": workers, **result})
+        print(f"   done in {time.perf_counter() - start:.0f}s")
+
+    print(f"\n{'workers':<9}{'endpoint':<10}{'req/s':>10}{'p95 (ms)':>10}{'errors':>8}{'speedup':>9}")
+    baseline = runs[0]
+    for run in runs:
+        for name in (*weights, "total"):
+            row = run["total"] if name == "total" else run["endpoints"][name]
+            before = baseline["total"] if name == "total" else baseline["endpoints"][name]
+            if not row["requests"]:
+                continue
+            print(f"{run['workers']:<9}{name:<10}{row['throughput_rps']:>10.0f}{row['p95_ms']:>10.2f}{row['errors']:>8}"
+                  f"{row['throughput_rps'] / before['throughput_rps']:>8.2f}x")
+
+    commit = current_commit()
+    output = ROOT / "benchmarks" / "results" / f"scaling-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "params": {"projects": args.projects, "tasks": args.tasks, "concurrency": args.concurrency,
+                   "duration_s": args.duration, "mix": weights},
+        "runs": runs,
+    }, indent=2) + "\n")
+    print(f"\n💾 Saved {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Compare response serialization cost for task lists: pydantic round trip vs the orjson fast path.
+
+"before" mirrors the old read routes: build a Task per document, let FastAPI validate the list
+against response_model and render it with json.dumps. "after" is what the read routes do now:
+hand the stored documents (already projected without _id) straight to orjson. Pure CPU, no Mongo.
+
+    python benchmarks/serialization_benchmark.py --sizes 1000 10000 --repeat 5
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import orjson
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from server import Task, TaskPriority, TaskStatus  # noqa: E402
+
+TASK_LIST = TypeAdapter(List[Task])
+
+
+def make_docs(count):
+    docs = []
+    for i in range(count):
+        doc = Task(
+            title=f"Task {i}",
+            description="Lorem ipsum dolor sit amet " * 4,
+            status=random.choice(list(TaskStatus)),
+            priority=random.choice(list(TaskPriority)),
+            project_id=str(ObjectId()),
+        ).dict()
+        doc["status"], doc["priority"] = doc["status"].value, doc["priority"].value
+        docs.append(doc)
+    return docs
+
+
+def pydantic_path(docs):
+    models = [Task(**{"_id": ObjectId(), **doc}) for doc in docs]
+    validated = TASK_LIST.validate_python(models)
+    content = TASK_LIST.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_path(docs):
+    return orjson.dumps(docs)
+
+
+def best_of(func, docs, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(docs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>8}{'pydantic (ms)':>16}{'orjson (ms)':>14}{'speedup':>10}")
+    for size in args.sizes:
+        docs = make_docs(size)
+        before = best_of(pydantic_path, docs, args.repeat)
+        after = best_of(orjson_path, docs, args.repeat)
+        print(f"{size:>8}{before:>16.2f}{after:>14.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Compare per-update latency of the old three-round-trip update against find_one_and_update.
+
+The old path is find_one + update_one + find_one (what update_task used to do); the new path is
+the single find_one_and_update now used by update_task/update_project. Both run against the
+Mongo instance configured in backend/.env, in a throwaway database, with N concurrent writers
+issuing Kanban-style status changes.
+
+    python benchmarks/update_benchmark.py --tasks 10000 --updates 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import ReturnDocument
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from server import Task, TaskStatus  # noqa: E402
+from storage import MongoStorage  # noqa: E402
+
+
+async def three_round_trips(db, task_id, update_data):
+    task = await db.tasks.find_one({"id": task_id})
+    if not task:
+        return None
+    await db.tasks.update_one({"id": task_id}, {"$set": update_data})
+    return await db.tasks.find_one({"id": task_id})
+
+
+async def single_round_trip(db, task_id, update_data):
+    task = await db.tasks.find_one_and_update(
+        {"id": task_id}, {"$set": update_data}, return_document=ReturnDocument.BEFORE
+    )
+    return {**task, **update_data} if task else None
+
+
+async def run(db, update, task_ids, num_updates, concurrency):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(num_updates):
+        queue.put_nowait(random.choice(task_ids))
+
+    async def worker():
+        while not queue.empty():
+            task_id = queue.get_nowait()
+            update_data = {"status": random.choice(list(TaskStatus)), "updated_at": datetime.utcnow()}
+            start = time.perf_counter()
+            await update(db, task_id, update_data)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "updates_per_s": num_updates / elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-name", default="todo_update_benchmark")
+    args = parser.parse_args()
+
+    storage = MongoStorage(os.environ["MONGO_URL"], args.db_name)
+    db = storage.db
+    await storage.client.drop_database(args.db_name)
+    await storage.ensure_indexes()
+
+    tasks = [Task(title=f"Task {i}").dict() for i in range(args.tasks)]
+    await db.tasks.insert_many(tasks)
+    task_ids = [t["id"] for t in tasks]
+
+    print(f"🏁 {args.updates} updates, {args.concurrency} concurrent writers, {args.tasks} tasks")
+    print(f"{'strategy':<26}{'mean (ms)':>12}{'p95 (ms)':>12}{'updates/s':>12}")
+    for name, update in (("find/update/find", three_round_trips), ("find_one_and_update", single_round_trip)):
+        result = await run(db, update, task_ids, args.updates, args.concurrency)
+        print(f"{name:<26}{result['mean_ms']:>12.2f}{result['p95_ms']:>12.2f}{result['updates_per_s']:>12.0f}")
+
+    await storage.client.drop_database(args.db_name)
+    await storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
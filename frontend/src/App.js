@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import "./App.css";
 import axios from "axios";
 
@@ -651,6 +651,23 @@ const Projects = ({ projects, tasks, onProjectCreate, onProjectUpdate, onProject
   );
 };
 
+// Apply a stats_delta from the change feed ({tasks: {total: 1, ...}, projects: {total: -1}})
+const applyStatsDelta = (stats, delta) => {
+  const next = { ...stats };
+  Object.entries(delta).forEach(([group, counters]) => {
+    next[group] = { ...(stats[group] || {}) };
+    Object.entries(counters).forEach(([key, value]) => {
+      next[group][key] = (next[group][key] || 0) + value;
+    });
+  });
+  return next;
+};
+
+const upsertById = (items, item) => {
+  const exists = items.some(existing => existing.id === item.id);
+  return exists ? items.map(existing => (existing.id === item.id ? item : existing)) : [item, ...items];
+};
+
 // Main App Component
 function App() {
   const [currentView, setCurrentView] = useState('dashboard');
@@ -658,6 +675,7 @@ function App() {
   const [tasks, setTasks] = useState([]);
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
+  const liveRef = useRef(false);
 
   const fetchData = async () => {
     try {
@@ -676,10 +694,75 @@ function App() {
     }
   };
 
+  const fetchStats = async () => {
+    try {
+      const statsRes = await axios.get(`${API}/stats`);
+      setStats(statsRes.data);
+    } catch (error) {
+      console.error('Error fetching stats:', error);
+    }
+  };
+
+  const applyEvent = (event) => {
+    const { type, data, stats_delta: statsDelta } = event;
+    switch (type) {
+      case 'task.created':
+      case 'task.updated':
+        setTasks(prev => upsertById(prev, data));
+        break;
+      case 'task.deleted':
+        setTasks(prev => prev.filter(task => task.id !== data.id));
+        break;
+      case 'tasks.archived': {
+        const archivedIds = new Set(data.ids);
+        setTasks(prev => prev.filter(task => !archivedIds.has(task.id)));
+        break;
+      }
+      case 'project.created':
+      case 'project.updated':
+        setProjects(prev => upsertById(prev, data));
+        break;
+      case 'project.deleted':
+        setProjects(prev => prev.filter(project => project.id !== data.id));
+        setTasks(prev => prev.filter(task => task.project_id !== data.id));
+        // The cascade removed an unknown mix of tasks, so re-read the counters
+        fetchStats();
+        return;
+      default:
+        // 'resync': we fell behind the feed
+        fetchData();
+        return;
+    }
+    if (statsDelta) {
+      setStats(prev => applyStatsDelta(prev, statsDelta));
+    } else {
+      fetchStats();
+    }
+  };
+
   useEffect(() => {
     fetchData();
+
+    const events = new EventSource(`${API}/events`);
+    let reconnecting = false;
+    events.onopen = () => {
+      // Anything that happened while disconnected was missed, so resync once on reconnect
+      if (reconnecting) fetchData();
+      liveRef.current = true;
+    };
+    events.onerror = () => {
+      liveRef.current = false;
+      reconnecting = true;
+    };
+    events.onmessage = (message) => applyEvent(JSON.parse(message.data));
+    return () => events.close();
   }, []);
 
+  // With the change feed connected, local state is already up to date after a mutation
+  const refreshIfOffline = () => {
+    if (!liveRef.current) fetchData();
+  };
+
   const handleTaskCreate = async (taskData) => {
     try {
       await axios.post(`${API}/tasks`, taskData);
@@ -751,7 +834,7 @@ function App() {
             onTaskCreate={handleTaskCreate}
             onTaskUpdate={handleTaskUpdate}
             onTaskDelete={handleTaskDelete}
-            onRefresh={fetchData}
+            onRefresh={refreshIfOffline}
           />
         )}
         {currentView === 'projects' && (
@@ -764,7 +847,7 @@ function App() {
             onTaskCreate={handleTaskCreate}
             onTaskUpdate={handleTaskUpdate}
             onTaskDelete={handleTaskDelete}
-            onRefresh={fetchData}
+            onRefresh={refreshIfOffline}
           />
         )}
       </main>
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+import storage as storage_module  # noqa: E402
+from storage import MemoryStorage, MongoStorage  # noqa: E402
+
+
+@pytest.fixture
+def use_storage(monkeypatch):
+    """Put a storage backend behind the app for the duration of the test."""
+    def use(storage):
+        monkeypatch.setattr(server, "storage", storage)
+        return storage
+    return use
+
+
+@pytest.fixture
+def mongo_storage(monkeypatch):
+    """MongoStorage over an in-process mongomock database, so the Mongo code paths run without a server."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    monkeypatch.setattr(storage_module, "AsyncIOMotorClient", mongomock_motor.AsyncMongoMockClient)
+    return MongoStorage("mongodb://localhost:27017", "test_database")
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def backend(request):
+    """Each backend in turn; modules that must pass on both override `storage` with this."""
+    return request.getfixturevalue("mongo_storage") if request.param == "mongo" else MemoryStorage()
+
+
+@pytest.fixture
+def storage(use_storage):
+    # Modules that need a recording or failing backend override this fixture
+    return use_storage(MemoryStorage())
+
+
+@pytest.fixture
+def client(storage):
+    return TestClient(server.app)
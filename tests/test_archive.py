@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from storage import MongoStorage
+
+
+@pytest.fixture
+def storage(backend, use_storage):
+    return use_storage(backend)
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(server, "task_archiver", server.TaskArchiver(done_after_days=30, batch_size=2, pause=0))
+    return client
+
+
+def add_task(client, title, status, updated_days_ago, project_id=None):
+    task = client.post("/api/tasks", json={"title": title, "project_id": project_id}).json()
+    updated_at = datetime.utcnow() - timedelta(days=updated_days_ago)
+    asyncio.run(server.storage.update_task(task["id"], {"status": status, "updated_at": updated_at}))
+    return task["id"]
+
+
+def archive_old_done_tasks(client):
+    project_id = client.post("/api/projects", json={"name": "Archive"}).json()["id"]
+    old_ids = [add_task(client, f"old {i}", "done", 60, project_id) for i in range(3)]
+    recent_id = add_task(client, "recent", "done", 1, project_id)
+    open_id = add_task(client, "open", "todo", 90, project_id)
+    asyncio.run(server.storage.repair_project_task_counts())
+
+    run = asyncio.run(server.task_archiver.run_once())
+    assert (run["archived"], run["batches"], run["error"]) == (3, 2, None)
+    return old_ids, recent_id, open_id
+
+
+def test_archive_moves_old_done_tasks_out_of_default_reads(client):
+    old_ids, recent_id, open_id = archive_old_done_tasks(client)
+    assert client.get("/api/tasks/archive/runs").json()[0]["archived"] == 3
+
+    assert {task["id"] for task in client.get("/api/tasks").json()} == {recent_id, open_id}
+    assert client.get(f"/api/tasks/{old_ids[0]}").status_code == 404
+    archived = client.get(f"/api/tasks/{old_ids[0]}", params={"include_archived": "true"})
+    assert archived.status_code == 200 and archived.json()["archived_at"]
+    assert asyncio.run(server.storage.get_tasks_by_ids(old_ids)) == []
+    assert client.get("/api/projects/summary").json()[0]["task_counts"]["done"] == 1
+
+
+def test_archived_tasks_are_counted_and_merged_back_on_request(client, storage):
+    if isinstance(storage, MongoStorage):
+        pytest.skip("mongomock implements neither $unionWith nor pipeline $lookup")
+    old_ids, recent_id, open_id = archive_old_done_tasks(client)
+
+    with_archive = client.get("/api/tasks", params={"include_archived": "true"}).json()
+    assert {task["id"] for task in with_archive} == {*old_ids, recent_id, open_id}
+    assert [task["id"] for task in with_archive][:2] == [open_id, recent_id]  # still newest first
+    assert all(task["archived_at"] for task in with_archive if task["id"] in old_ids)
+    assert client.get("/api/stats").json()["tasks"]["total"] == 2
+    assert client.get("/api/stats", params={"include_archived": "true"}).json()["tasks"]["total"] == 5
+
+
+def test_live_tasks_are_stored_without_archived_at(client):
+    task_id = client.post("/api/tasks", json={"title": "live"}).json()["id"]
+    assert "archived_at" not in asyncio.run(server.storage.get_task(task_id))
@@ -0,0 +1,36 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(server, "task_cache", server.DocumentCache(max_size=10))
+    monkeypatch.setattr(server, "project_cache", server.DocumentCache(max_size=10))
+    return client
+
+
+def test_batch_get_keeps_request_order_and_marks_missing(client, monkeypatch):
+    project = client.post("/api/projects", json={"name": "Batch"}).json()
+    first = client.post("/api/tasks", json={"title": "first", "project_id": project["id"]}).json()
+    second = client.post("/api/tasks", json={"title": "second"}).json()
+    client.get(f"/api/tasks/{first['id']}")  # cached; only the other ids should reach storage
+
+    loads = []
+    get_tasks_by_ids = server.storage.get_tasks_by_ids
+    monkeypatch.setattr(server.storage, "get_tasks_by_ids", lambda ids: (loads.append(ids), get_tasks_by_ids(ids))[1])
+    ids = [second["id"], "missing", first["id"], second["id"]]
+    response = client.post("/api/tasks/batch-get", json={"ids": ids, "embed_project": True})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(result["id"], result["found"]) for result in results] == \
+        [(second["id"], True), ("missing", False), (first["id"], True), (second["id"], True)]
+    assert loads == [[second["id"], "missing"]]
+    assert results[2]["project"]["name"] == "Batch" and results[0]["project"] is None
+    assert results[1]["task"] is None
+
+    projects = client.post("/api/projects/batch-get", json={"ids": ["missing", project["id"]]}).json()["results"]
+    assert [(result["found"], (result["project"] or {}).get("name")) for result in projects] == [(False, None), (True, "Batch")]
+
+    too_many = {"ids": [str(i) for i in range(server.BATCH_GET_MAX_IDS + 1)]}
+    assert client.post("/api/projects/batch-get", json=too_many).status_code == 422
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def storage(backend, use_storage):
+    asyncio.run(backend.ensure_indexes())
+    return use_storage(backend)
+
+
+def task_doc(task_id, project_id=None):
+    now = datetime(2024, 1, 1)
+    return {"id": task_id, "title": task_id, "description": "", "status": "todo", "priority": "medium",
+            "project_id": project_id, "created_at": now, "updated_at": now}
+
+
+def test_write_errors_are_reported_per_operation(storage):
+    asyncio.run(storage.insert_task(task_doc("existing")))
+
+    outcome = asyncio.run(storage.bulk_write_tasks([
+        ("insert", task_doc("new")),
+        ("insert", task_doc("existing")),
+        ("update", "existing", {"status": "done"}),
+        ("delete", "missing"),
+    ]))
+
+    assert (outcome["inserted"], outcome["updated"], outcome["deleted"]) == (1, 1, 0)
+    assert set(outcome["errors"]) == {1, 3}
+    assert asyncio.run(storage.get_task("existing"))["status"] == "done"
+    assert asyncio.run(storage.get_task("new"))["title"] == "new"
+
+
+def test_bulk_endpoint_applies_each_operation_and_keeps_counters(client, storage):
+    project_id = client.post("/api/projects", json={"name": "Bulk"}).json()["id"]
+    kept, removed = (client.post("/api/tasks", json={"title": title, "project_id": project_id}).json()["id"]
+                     for title in ("kept", "removed"))
+
+    response = client.post("/api/tasks/bulk", json={"operations": [
+        {"op": "create", "data": {"title": "added", "project_id": project_id}},
+        {"op": "update", "id": kept, "data": {"status": "done"}},
+        {"op": "delete", "id": removed},
+        {"op": "update", "id": kept, "data": {"status": "todo"}},
+        {"op": "delete", "id": "missing"},
+    ]}).json()
+
+    assert (response["inserted"], response["updated"], response["deleted"]) == (1, 1, 1)
+    assert [result["ok"] for result in response["results"]] == [True, True, True, False, False]
+    assert asyncio.run(storage.get_task(kept))["status"] == "done"
+    counts = client.get("/api/projects/summary").json()[0]["task_counts"]
+    assert (counts["todo"], counts["done"]) == (1, 1)
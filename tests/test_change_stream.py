@@ -0,0 +1,67 @@
+import asyncio
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+import server
+
+
+class FakeStream:
+    def __init__(self, changes, error):
+        self.changes = changes
+        self.error = error
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        for change in self.changes:
+            self.resume_token = {"_data": change["fullDocument"]["id"]}
+            yield change
+        raise self.error
+
+
+class FakeCollection:
+    """Each watch() call plays the next script entry: (changes to deliver, error to end with)."""
+    name = "tasks"
+
+    def __init__(self, script):
+        self.script = script
+        self.calls = []
+
+    def watch(self, **options):
+        self.calls.append(options)
+        if not self.script:
+            raise asyncio.CancelledError
+        changes, error = self.script.pop(0)
+        if changes is None:
+            raise error
+        return FakeStream(changes, error)
+
+
+def created(task_id):
+    return {"operationType": "insert", "fullDocument": {"id": task_id, "status": "todo", "priority": "low"}}
+
+
+def test_watch_resumes_after_errors_and_resyncs_when_it_cannot(monkeypatch):
+    monkeypatch.setattr(server, "CHANGE_STREAM_RETRY_SECONDS", 0)
+    broker = server.EventBroker(source="changestream")
+    queue = broker.subscribe()
+    collection = FakeCollection([
+        ([created("a")], PyMongoError("primary stepped down")),
+        (None, OperationFailure("history lost", code=286)),
+        ([created("b")], PyMongoError("network blip")),
+    ])
+
+    try:
+        asyncio.run(broker.watch(collection, "task"))
+    except asyncio.CancelledError:
+        pass
+
+    assert [call["resume_after"] for call in collection.calls] == [None, {"_data": "a"}, None, {"_data": "b"}]
+    assert all("full_document_before_change" not in call for call in collection.calls)
+    events = [queue.get_nowait()["type"] for _ in range(queue.qsize())]
+    assert events == ["task.created", "resync", "task.created"]
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime
+
+import server
+from cluster import UnixSocketBroker, run_hub
+
+
+def test_hub_relays_to_peers_and_fails_over_leadership(tmp_path):
+    path = str(tmp_path / "broker.sock")
+
+    async def scenario():
+        ready = asyncio.Event()
+        hub = asyncio.create_task(run_hub(path, ready))
+        await ready.wait()
+
+        received = {"a": [], "b": []}
+        leaders = []
+
+        async def join(name):
+            broker = UnixSocketBroker(path)
+
+            async def on_leader():
+                leaders.append(name)
+            await broker.start(received[name].append, on_leader)
+            await asyncio.sleep(0.05)
+            return broker
+
+        first = await join("a")
+        second = await join("b")
+        first.publish({"type": "ping"})
+        await asyncio.sleep(0.05)
+        assert received == {"a": [], "b": [{"type": "ping"}]}
+        assert leaders == ["a"]
+
+        await first.close()
+        await asyncio.sleep(0.05)
+        assert leaders == ["a", "b"]
+
+        await second.close()
+        hub.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_peer_task_write_updates_versions_and_drops_cached_copy(monkeypatch):
+    monkeypatch.setattr(server, "collection_versions", server.CollectionVersions("local", epoch="e1"))
+    monkeypatch.setattr(server, "task_cache", server.DocumentCache(max_size=10))
+    now = datetime.utcnow()
+    old_task = {"id": "t1", "title": "Old", "status": "todo", "priority": "medium", "created_at": now, "updated_at": now}
+    server.task_cache.put("t1", old_task, server.task_cache.write_seq)
+
+    peer = server.CollectionVersions("peer", epoch="e1")
+    peer.bump("tasks")
+    server.worker_sync.apply({
+        "type": "task", "worker": "peer", "versions": peer.own(),
+        "old": old_task, "new": {**old_task, "title": "New"},
+    })
+
+    assert server.collection_versions.etag("tasks") == peer.etag("tasks")
+    assert server.task_cache.get("t1") is None
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+import server
+from storage import MemoryStorage
+
+
+class RecordingStorage(MemoryStorage):
+    """In-memory storage that counts how often a task result set is read."""
+
+    def __init__(self):
+        super().__init__()
+        self.list_calls = 0
+
+    async def list_tasks(self, *args, **kwargs):
+        self.list_calls += 1
+        return await super().list_tasks(*args, **kwargs)
+
+
+@pytest.fixture
+def storage(use_storage):
+    return use_storage(RecordingStorage())
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(server, "collection_versions", server.CollectionVersions())
+    # These tests write to storage behind the API's back, so bypass the document cache
+    monkeypatch.setattr(server, "task_cache", server.DocumentCache(max_size=0))
+    return client
+
+
+def test_unchanged_task_list_returns_304_without_reading_the_cursor(client):
+    client.post("/api/tasks", json={"title": "Write tests"})
+
+    first = client.get("/api/tasks")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert server.storage.list_calls == 1
+
+    second = client.get("/api/tasks", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+    assert server.storage.list_calls == 1
+
+
+def test_write_invalidates_list_etag(client):
+    etag = client.get("/api/tasks").headers["etag"]
+
+    client.post("/api/tasks", json={"title": "Another task"})
+
+    response = client.get("/api/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 1
+
+
+def test_task_detail_etag_follows_updated_at(client):
+    task = client.post("/api/tasks", json={"title": "Detail"}).json()
+
+    first = client.get(f"/api/tasks/{task['id']}")
+    etag = first.headers["etag"]
+
+    assert client.get(f"/api/tasks/{task['id']}", headers={"If-None-Match": etag}).status_code == 304
+    server.storage.tasks.update(task["id"], {"updated_at": datetime(2100, 1, 1)})
+    assert client.get(f"/api/tasks/{task['id']}", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,51 @@
+import pytest
+
+import server
+from storage import MongoStorage
+
+
+@pytest.fixture
+def storage(backend, use_storage):
+    return use_storage(backend)
+
+
+@pytest.fixture
+def stats_cache(monkeypatch):
+    cache = server.StatsCache(enabled=True)
+    # The store starts empty, so zeroed counters are already current without a reconcile
+    cache.ready = True
+    monkeypatch.setattr(server, "stats_cache", cache)
+    return cache
+
+
+def expected_stats(client):
+    tasks = client.get("/api/tasks").json()
+    open_high = [task for task in tasks if task["priority"] == "high" and task["status"] != "done"]
+    return server.format_stats(len(tasks), sum(task["status"] == "done" for task in tasks), len(open_high),
+                               len(client.get("/api/projects").json()),
+                               len({task["project_id"] for task in tasks if task["project_id"]}))
+
+
+def populate(client):
+    project_ids = [client.post("/api/projects", json={"name": name}).json()["id"] for name in ("a", "b", "c")]
+    tasks = [client.post("/api/tasks", json={"title": f"t{i}", "priority": priority, "project_id": project_id}).json()
+             for i, (priority, project_id) in enumerate([("high", project_ids[0]), ("high", project_ids[0]),
+                                                         ("low", project_ids[1]), ("medium", None)])]
+    client.put(f"/api/tasks/{tasks[0]['id']}", json={"status": "done"})
+    client.put(f"/api/tasks/{tasks[2]['id']}", json={"project_id": project_ids[2]})
+    client.delete(f"/api/tasks/{tasks[3]['id']}")
+
+
+def test_cached_counters_follow_every_write(client, stats_cache):
+    populate(client)
+
+    assert stats_cache.snapshot() == expected_stats(client)
+    assert client.get("/api/stats").json() == expected_stats(client)
+
+
+def test_aggregate_matches_the_stored_tasks(client, storage):
+    if isinstance(storage, MongoStorage):
+        pytest.skip("mongomock does not implement pipeline $lookup")
+    populate(client)
+
+    assert client.get("/api/stats").json() == expected_stats(client)
@@ -0,0 +1,85 @@
+import pytest
+
+import server
+from storage import MemoryStorage
+
+
+class RecordingStorage(MemoryStorage):
+    """In-memory storage that counts single-task reads."""
+
+    def __init__(self):
+        super().__init__()
+        self.get_calls = 0
+
+    async def get_task(self, *args, **kwargs):
+        self.get_calls += 1
+        return await super().get_task(*args, **kwargs)
+
+
+@pytest.fixture
+def storage(use_storage):
+    return use_storage(RecordingStorage())
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(server, "task_cache", server.DocumentCache(max_size=2, ttl=60))
+    monkeypatch.setattr(server, "project_cache", server.DocumentCache(max_size=2, ttl=60))
+    return client
+
+
+def test_repeated_detail_reads_are_served_from_cache(client):
+    task = client.post("/api/tasks", json={"title": "Hot task"}).json()
+
+    for _ in range(3):
+        assert client.get(f"/api/tasks/{task['id']}").status_code == 200
+
+    assert server.storage.get_calls == 1
+    stats = client.get("/api/cache/stats").json()["tasks"]
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_update_and_delete_keep_cache_coherent(client):
+    task = client.post("/api/tasks", json={"title": "Before"}).json()
+    client.get(f"/api/tasks/{task['id']}")
+
+    client.put(f"/api/tasks/{task['id']}", json={"title": "After"})
+    assert client.get(f"/api/tasks/{task['id']}").json()["title"] == "After"
+
+    client.delete(f"/api/tasks/{task['id']}")
+    assert client.get(f"/api/tasks/{task['id']}").status_code == 404
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = server.DocumentCache(max_size=2, ttl=60)
+    for key in ("a", "b"):
+        cache.put(key, {"id": key})
+    cache.get("a")
+    cache.put("c", {"id": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": "a"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_fill_that_raced_a_write_is_discarded():
+    cache = server.DocumentCache(max_size=10, ttl=60)
+    write_seq = cache.write_seq
+    cache.invalidate("a")
+    cache.put("a", {"id": "a", "title": "stale"}, write_seq)
+
+    assert cache.get("a") is None
+
+
+def test_cached_copy_after_update_matches_the_stored_one(client):
+    task = client.post("/api/tasks", json={"title": "Due"}).json()
+    client.get(f"/api/tasks/{task['id']}")
+
+    client.put(f"/api/tasks/{task['id']}", json={"due_date": "2030-01-01T09:00:00+09:00", "status": "done"})
+    cached = client.get(f"/api/tasks/{task['id']}")
+    server.task_cache.invalidate(task["id"])
+    stored = client.get(f"/api/tasks/{task['id']}")
+
+    assert cached.json() == stored.json()
+    assert cached.json()["due_date"] == "2030-01-01T00:00:00"
+    assert cached.headers["etag"] == stored.headers["etag"]
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+
+def create(client, title, days, **fields):
+    due_date = (datetime.utcnow() + timedelta(days=days)).isoformat()
+    return client.post("/api/tasks", json={"title": title, "due_date": due_date, **fields}).json()
+
+
+def titles(response):
+    assert response.status_code == 200
+    return [task["title"] for task in response.json()["items"]]
+
+
+def test_open_tasks_come_back_soonest_first(client):
+    create(client, "Next week", 7)
+    create(client, "Yesterday", -1)
+    finished = create(client, "Finished", -2)
+    create(client, "Tomorrow", 1)
+    client.post("/api/tasks", json={"title": "No due date"})
+    client.put(f"/api/tasks/{finished['id']}", json={"status": "done"})
+
+    assert titles(client.get("/api/tasks/due")) == ["Yesterday", "Tomorrow", "Next week"]
+    assert titles(client.get("/api/tasks/due", params={"overdue": "true"})) == ["Yesterday"]
+    window = {"after": datetime.utcnow().isoformat(), "before": (datetime.utcnow() + timedelta(days=3)).isoformat()}
+    assert titles(client.get("/api/tasks/due", params=window)) == ["Tomorrow"]
+
+
+def test_due_pages_and_filters(client):
+    project = client.post("/api/projects", json={"name": "Release"}).json()
+    for day in range(5):
+        create(client, f"Day {day}", day, project_id=project["id"])
+    create(client, "Elsewhere", 0)
+
+    seen, cursor = [], None
+    while True:
+        params = {"project_id": project["id"], "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/tasks/due", params=params).json()
+        seen += [task["title"] for task in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [f"Day {day}" for day in range(5)]
+    assert client.get("/api/tasks/due", params={"status": "done"}).status_code == 400
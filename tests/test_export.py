@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def storage(backend, use_storage, monkeypatch):
+    monkeypatch.setattr(server, "project_deletions", server.ProjectDeletions())
+    return use_storage(backend)
+
+
+def read_ndjson(response):
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_streams_every_visible_document_in_page_order(client, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_BATCH_SIZE", 2)
+    project_ids = [client.post("/api/projects", json={"name": name}).json()["id"] for name in ("kept", "deleting")]
+    task_ids = [client.post("/api/tasks", json={"title": f"t{i}", "project_id": project_ids[i % 2]}).json()["id"]
+                for i in range(5)]
+    server.project_deletions.deleting.add(project_ids[1])
+
+    tasks = read_ndjson(client.get("/api/export/tasks"))
+    assert {task["id"] for task in tasks} == set(task_ids[::2])
+    assert tasks == sorted(tasks, key=lambda task: (task["created_at"], task["id"]), reverse=True)
+    assert [task["id"] for task in read_ndjson(client.get("/api/export/tasks", params={"project_id": project_ids[0],
+                                                                                        "status": "done"}))] == []
+    assert {project["name"] for project in read_ndjson(client.get("/api/export/projects"))} == {"kept", "deleting"}
@@ -0,0 +1,31 @@
+def test_fields_limits_list_documents(client):
+    project = client.post("/api/projects", json={"name": "Board", "description": "Long text"}).json()
+    client.post("/api/tasks", json={"title": "Card", "description": "Long text", "project_id": project["id"]})
+
+    tasks = client.get("/api/tasks", params={"fields": "title,status"}).json()
+    assert set(tasks[0]) == {"id", "created_at", "title", "status"}
+
+    page = client.get(f"/api/projects/{project['id']}/tasks", params={"fields": "priority", "limit": 10}).json()
+    assert set(page["items"][0]) == {"id", "created_at", "priority"}
+
+    projects = client.get("/api/projects", params={"fields": "name"}).json()
+    assert projects == [{"id": project["id"], "created_at": project["created_at"], "name": "Board"}]
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/api/tasks", params={"fields": "title,secret"})
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+
+def test_large_responses_are_gzipped(client):
+    client.post("/api/tasks/bulk", json={"operations": [
+        {"op": "create", "data": {"title": f"Task {i}"}} for i in range(50)
+    ]})
+
+    response = client.get("/api/tasks", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 50
+
+    small = client.get("/api/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+import server
+from storage import MemoryStorage
+
+
+class SlowInsertStorage(MemoryStorage):
+    """Counts inserts and yields mid-insert so concurrent requests overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.inserts = 0
+
+    async def insert_task(self, task):
+        self.inserts += 1
+        await asyncio.sleep(0.05)
+        await super().insert_task(task)
+
+
+@pytest.fixture
+def storage(use_storage, monkeypatch):
+    monkeypatch.setattr(server, "idempotent_writes", server.IdempotentWrites())
+    return use_storage(SlowInsertStorage())
+
+
+def test_retry_replays_the_stored_response(client, storage):
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = client.post("/api/tasks", json={"title": "Once"}, headers=headers)
+    second = client.post("/api/tasks", json={"title": "Once"}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert storage.inserts == 1
+    assert len(client.get("/api/tasks").json()) == 1
+
+
+def test_reused_key_with_different_body_is_rejected(client):
+    client.post("/api/tasks", json={"title": "Original"}, headers={"Idempotency-Key": "k"})
+
+    response = client.post("/api/tasks", json={"title": "Changed"}, headers={"Idempotency-Key": "k"})
+
+    assert response.status_code == 422
+
+
+def test_concurrent_requests_are_coalesced_onto_one_insert(storage):
+    async def burst():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/tasks", json={"title": "Storm"}, headers={"Idempotency-Key": "storm"})
+                for _ in range(5)
+            ))
+
+    responses = asyncio.run(burst())
+
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert storage.inserts == 1
+
+
+def test_claims_on_both_backends_hold_until_expired_or_stale(backend):
+    asyncio.run(backend.ensure_indexes())
+    # Near the real clock: mongomock applies the TTL index against it
+    now = datetime.utcnow().replace(microsecond=0)
+    claim = lambda request_hash, at: asyncio.run(backend.claim_idempotency_key(
+        "key", request_hash, at, at + timedelta(hours=1), at - timedelta(minutes=1)))
+
+    assert claim("a", now) is None
+    held = claim("b", now + timedelta(seconds=10))
+    assert (held["request_hash"], held["state"]) == ("a", "pending")
+
+    asyncio.run(backend.complete_idempotency_key("key", {"status": 200}))
+    done = claim("b", now + timedelta(minutes=5))
+    assert (done["state"], done["response"]) == ("done", {"status": 200})
+
+    # Past expires_at the record is taken over even though the TTL monitor has not removed it yet
+    assert claim("c", now + timedelta(hours=2)) is None
+    assert claim("d", now + timedelta(hours=2, seconds=1))["request_hash"] == "c"
+    # A pending claim whose writer stopped before stale_before is taken over too
+    assert claim("e", now + timedelta(hours=2, minutes=5)) is None
@@ -0,0 +1,66 @@
+import asyncio
+
+from pymongo.errors import PyMongoError
+import pytest
+
+import metrics
+from profiling import ProfiledDatabase
+from storage import MemoryStorage
+
+
+@pytest.fixture
+def storage(use_storage):
+    return use_storage(metrics.instrument_storage(MemoryStorage(), "memory"))
+
+
+def test_missing_task_is_a_404_not_a_500(client):
+    assert client.get("/api/tasks/missing").status_code == 404
+
+
+def test_metrics_are_labelled_by_route_template_and_storage_operation(client):
+    task = client.post("/api/tasks", json={"title": "Measure me"}).json()
+    client.delete(f"/api/tasks/{task['id']}")
+
+    body = client.get("/api/metrics").text
+
+    assert 'http_requests_total{method="DELETE",route="/api/tasks/{task_id}",status="200"}' in body
+    assert task["id"] not in body
+    assert 'storage_operation_duration_seconds_count{backend="memory",operation="delete_task"}' in body
+
+
+def test_mongo_calls_are_labelled_by_collection_and_driver_operation():
+    class Collection:
+        name = "tasks"
+
+        async def find_one(self, query, projection=None):
+            return {"id": query["id"]}
+
+        async def delete_one(self, query):
+            raise PyMongoError("connection reset")
+
+    db = ProfiledDatabase({"tasks": Collection()}, metrics.MongoMetrics())
+
+    async def run():
+        await db["tasks"].find_one({"id": "1"})
+        with pytest.raises(PyMongoError):
+            await db["tasks"].delete_one({"id": "1"})
+
+    asyncio.run(run())
+    body = metrics.REGISTRY.render()
+    assert 'mongo_operation_duration_seconds_count{collection="tasks",operation="find_one"}' in body
+    assert 'mongo_documents_total{collection="tasks",operation="find_one"}' in body
+    assert 'mongo_operation_errors_total{collection="tasks",operation="delete_one"}' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+
+    assert histogram.render() == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
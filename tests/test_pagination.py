@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def storage(backend, use_storage):
+    return use_storage(backend)
+
+
+def seed(storage, project_id, status, count, start, step=timedelta(seconds=1)):
+    for i in range(count):
+        created_at = start + step * i
+        asyncio.run(storage.insert_task({"id": f"{project_id}-{status}-{i}", "title": "t", "status": status,
+                                         "priority": "medium", "project_id": project_id, "created_at": created_at,
+                                         "updated_at": created_at}))
+
+
+def read_all_pages(client, path, limit, **params):
+    ids, cursor = [], None
+    while True:
+        page = client.get(path, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})}).json()
+        ids += [task["id"] for task in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_filtered_page_skips_excluded_documents_without_coming_back_short(storage):
+    start = datetime(2024, 1, 1)
+    seed(storage, "other", "done", 30, start)
+    seed(storage, "kept", "todo", 3, start + timedelta(minutes=1))
+    # Newer, so they sit at the top of the todo candidates
+    seed(storage, "deleting", "todo", 3, start + timedelta(minutes=2))
+
+    page = asyncio.run(storage.list_tasks(status="todo", exclude_project_ids={"deleting"}, limit=2))
+    assert [task["id"] for task in page] == ["kept-todo-2", "kept-todo-1"]
+    last = page[-1]
+    rest = asyncio.run(storage.list_tasks(status="todo", exclude_project_ids={"deleting"}, limit=2,
+                                          after=(last["created_at"], last["id"])))
+    assert [task["id"] for task in rest] == ["kept-todo-0"]
+
+
+def test_cursor_pages_break_created_at_ties_on_id(client, storage):
+    # Every task shares one created_at, so only the id half of the keyset filter moves the cursor
+    seed(storage, "p1", "todo", 7, datetime(2024, 1, 1), step=timedelta(0))
+    seed(storage, "p2", "todo", 2, datetime(2024, 1, 2))
+
+    ids = read_all_pages(client, "/api/tasks", 3, project_id="p1")
+    assert ids == sorted((f"p1-todo-{i}" for i in range(7)), reverse=True)
+    assert read_all_pages(client, "/api/projects/p1/tasks", 2) == ids
+    assert read_all_pages(client, "/api/tasks", 4) == ["p2-todo-1", "p2-todo-0", *ids]
+
+
+def test_project_pages_follow_creation_order(client):
+    names = [f"project {i}" for i in range(5)]
+    for name in names:
+        client.post("/api/projects", json={"name": name})
+
+    seen, cursor = [], None
+    while True:
+        page = client.get("/api/projects", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+        seen += [project["name"] for project in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(names) and len(seen) == len(names)
@@ -0,0 +1,71 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import server
+from profiling import ProfiledDatabase, ProfilingMiddleware, QueryProfiler, filter_shape, indexes_used
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit] if limit else self.docs
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class FakeCollection:
+    name = "tasks"
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([doc for doc in self.docs if all(doc.get(k) == v for k, v in (query or {}).items())])
+
+    async def find_one(self, query, projection=None):
+        return next(iter(await self.find(query).to_list()), None)
+
+
+def test_filter_shape_and_index_names():
+    assert filter_shape({"project_id": "p1", "status": {"$in": ["todo", "done"]}}) == \
+        {"project_id": "?", "status": {"$in": ["?"]}}
+    plan = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status"}},
+                             "rejectedPlans": [{"stage": "COLLSCAN"}]}}
+    assert indexes_used(plan) == ["status"]
+
+
+def test_request_profile_collects_operations_and_tags_response(monkeypatch):
+    profiler = QueryProfiler(slow_query_ms=1000, explain_sample_rate=0)
+    db = ProfiledDatabase({"tasks": FakeCollection([{"id": "1", "status": "todo"}, {"id": "2", "status": "done"}])},
+                          profiler)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/items/{status}")
+    async def items(status: str):
+        docs = await db["tasks"].find({"status": status}).sort("created_at", -1).limit(10).to_list(10)
+        await db["tasks"].find_one({"id": "1"})
+        return [doc["id"] for doc in docs]
+
+    response = TestClient(app).get("/items/todo")
+    assert response.json() == ["1"]
+    assert response.headers["server-timing"].startswith("db;dur=")
+    profile = profiler.get(response.headers["x-query-profile"])
+    assert profile["route"] == "/items/{status}" and profile["status"] == 200
+    assert [(op["operation"], op["filter"], op["documents"]) for op in profile["operations"]] == \
+        [("find", {"status": "?"}, 1), ("find_one", {"id": "?"}, 1)]
+
+    monkeypatch.setattr(server, "QUERY_PROFILING", True)
+    monkeypatch.setattr(server, "query_profiler", profiler)
+    client = TestClient(server.app)
+    assert client.get("/api/debug/queries").json()[0]["operations"] == 2
+    assert client.get(f"/api/debug/queries/{profile['id']}").json()["path"] == "/items/todo"
+    monkeypatch.setattr(server, "QUERY_PROFILING", False)
+    assert client.get("/api/debug/queries").status_code == 404
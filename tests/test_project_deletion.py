@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.fixture
+def storage(backend, use_storage, monkeypatch):
+    monkeypatch.setattr(server, "project_deletions", server.ProjectDeletions(batch_size=2, pause=0))
+    return use_storage(backend)
+
+
+def test_project_tasks_are_hidden_at_once_and_deleted_in_batches(storage):
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            doomed = (await client.post("/api/projects", json={"name": "doomed"})).json()["id"]
+            kept = (await client.post("/api/projects", json={"name": "kept"})).json()["id"]
+            for i in range(5):
+                await client.post("/api/tasks", json={"title": f"doomed {i}", "project_id": doomed})
+            kept_task = (await client.post("/api/tasks", json={"title": "kept", "project_id": kept})).json()["id"]
+
+            response = await client.delete(f"/api/projects/{doomed}")
+            assert response.status_code == 202
+            assert response.json()["deletion"]["state"] == "deleting"
+            # Hidden before the background job has removed anything
+            assert [task["id"] for task in (await client.get("/api/tasks")).json()] == [kept_task]
+            assert (await client.get(f"/api/projects/{doomed}")).status_code == 404
+
+            await asyncio.gather(*server.project_deletions._runners)
+            status = (await client.get(f"/api/projects/{doomed}/deletion")).json()
+            assert (status["state"], status["deleted_tasks"]) == ("deleted", 5)
+            assert [project["id"] for project in (await client.get("/api/projects")).json()] == [kept]
+        return doomed
+
+    doomed = asyncio.run(scenario())
+    assert asyncio.run(storage.get_project(doomed, include_deleting=True)) is None
+    assert asyncio.run(storage.list_tasks(project_id=doomed)) == []
+    assert asyncio.run(storage.delete_project_tasks(doomed, 10)) == 0
+
+
+def test_marked_projects_are_resumed_after_a_restart(storage):
+    async def scenario():
+        now = datetime(2024, 1, 1)
+        await storage.insert_project({"id": "p1", "name": "left behind", "description": "", "created_at": now,
+                                      "updated_at": now})
+        await storage.mark_project_deleting("p1", now)
+        await server.project_deletions.resume()
+        assert server.project_deletions.deleting == {"p1"}
+        await asyncio.gather(*server.project_deletions._runners)
+        return await storage.deleting_project_ids()
+
+    assert asyncio.run(scenario()) == []
+    assert server.project_deletions.deleting == set()
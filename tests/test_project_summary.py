@@ -0,0 +1,103 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+from storage import MemoryStorage
+
+
+def summary_counts(client, project_id):
+    summaries = {summary["id"]: summary for summary in client.get("/api/projects/summary").json()}
+    return summaries[project_id]["task_counts"]
+
+
+def test_counters_follow_task_writes(client):
+    project = client.post("/api/projects", json={"name": "Launch"}).json()
+    urgent = client.post("/api/tasks", json={"title": "Urgent", "priority": "high", "project_id": project["id"]}).json()
+    other = client.post("/api/tasks", json={"title": "Other", "project_id": project["id"]}).json()
+    assert summary_counts(client, project["id"]) == {"todo": 2, "in_progress": 0, "done": 0, "high_priority_open": 1}
+
+    client.put(f"/api/tasks/{urgent['id']}", json={"status": "done"})
+    client.post("/api/tasks/bulk", json={"operations": [
+        {"op": "update", "id": other["id"], "data": {"status": "in_progress"}},
+        {"op": "create", "data": {"title": "Bulk", "priority": "high", "project_id": project["id"]}},
+    ]})
+    assert summary_counts(client, project["id"]) == {"todo": 1, "in_progress": 1, "done": 1, "high_priority_open": 1}
+
+    client.delete(f"/api/tasks/{urgent['id']}")
+    assert summary_counts(client, project["id"]) == {"todo": 1, "in_progress": 1, "done": 0, "high_priority_open": 1}
+    assert "task_counts" not in client.get(f"/api/projects/{project['id']}").json()
+
+
+def test_repair_recomputes_drifted_counters(client):
+    project = client.post("/api/projects", json={"name": "Drift"}).json()
+    client.post("/api/tasks", json={"title": "Counted", "project_id": project["id"]})
+    server.storage.project_task_counts[project["id"]]["todo"] = 42
+
+    assert client.post("/api/projects/summary/repair").json() == {"repaired": 1}
+    assert summary_counts(client, project["id"])["todo"] == 1
+
+
+def test_bulk_rejects_a_task_targeted_twice(client, monkeypatch):
+    monkeypatch.setattr(server, "stats_cache", server.StatsCache(enabled=True))
+    asyncio.run(server.stats_cache.reconcile())
+    project = client.post("/api/projects", json={"name": "Twice"}).json()
+    task = client.post("/api/tasks", json={"title": "Once", "project_id": project["id"]}).json()
+
+    response = client.post("/api/tasks/bulk", json={"operations": [
+        {"op": "delete", "id": task["id"]},
+        {"op": "delete", "id": task["id"]},
+        {"op": "update", "id": task["id"], "data": {"status": "done"}},
+    ]}).json()
+    assert [result["ok"] for result in response["results"]] == [True, False, False]
+    assert response["deleted"] == 1
+    assert client.get("/api/stats").json()["tasks"]["total"] == 0
+    assert summary_counts(client, project["id"])["todo"] == 0
+
+
+def test_bulk_write_reports_unmatched_targets():
+    storage = MemoryStorage()
+    outcome = asyncio.run(storage.bulk_write_tasks([("update", "gone", {"title": "x"}), ("delete", "gone")]))
+    assert (outcome["updated"], outcome["deleted"], sorted(outcome["errors"])) == (0, 0, [0, 1])
+
+
+def test_task_events_defer_stats_when_project_membership_changes():
+    task = {"id": "t1", "status": "todo", "priority": "high"}
+    assert server.task_stats_delta(None, task)["tasks"]["high_priority"] == 1
+    assert server.task_stats_delta(None, {**task, "project_id": "p1"}) is None
+    assert server.archived_event([{"id": "t1", "project_id": "p1"}])["stats_delta"] is None
+
+
+class RacingStorage(MemoryStorage):
+    """Lands another writer's update on the first targeted task just before the bulk write."""
+
+    async def bulk_write_tasks(self, operations: list) -> dict:
+        task_id = next(operation[1] for operation in operations if operation[0] != "insert")
+        old_task = await self.update_task(task_id, {"status": "in_progress"})
+        await server.record_project_task_counts([(old_task, {**old_task, "status": "in_progress"})])
+        return await super().bulk_write_tasks(operations)
+
+
+def test_bulk_counters_follow_the_task_each_write_replaced(use_storage):
+    use_storage(RacingStorage())
+    client = TestClient(server.app)
+    project = client.post("/api/projects", json={"name": "Race"}).json()
+    task = client.post("/api/tasks", json={"title": "Raced", "project_id": project["id"]}).json()
+
+    client.post("/api/tasks/bulk", json={"operations": [{"op": "update", "id": task["id"], "data": {"status": "done"}}]})
+
+    assert summary_counts(client, project["id"]) == {"todo": 0, "in_progress": 0, "done": 1, "high_priority_open": 0}
+
+
+def test_startup_repair_moves_the_summary_etag_only_when_it_changes_counters(client):
+    project = client.post("/api/projects", json={"name": "Drift"}).json()
+    client.post("/api/tasks", json={"title": "Counted", "project_id": project["id"]})
+    etag = client.get("/api/projects/summary").headers["etag"]
+
+    asyncio.run(server.repair_project_task_counts())
+    assert client.get("/api/projects/summary", headers={"If-None-Match": etag}).status_code == 304
+
+    server.storage.project_task_counts[project["id"]]["todo"] = 42
+    asyncio.run(server.repair_project_task_counts())
+    response = client.get("/api/projects/summary", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()[0]["task_counts"]["todo"] == 1
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+import server
+from storage import MemoryStorage
+
+
+class UnreachableStorage(MemoryStorage):
+    async def ping(self):
+        raise ConnectionError("no primary available")
+
+    async def warm_up(self, connections):
+        await self.ping()
+
+
+def test_ready_after_lifespan_warm_up(use_storage):
+    use_storage(MemoryStorage())
+    with TestClient(server.app) as client:
+        assert server.app.state.warm
+        response = client.get("/api/health/ready")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_not_ready_while_database_is_unreachable(use_storage):
+    use_storage(UnreachableStorage())
+    with TestClient(server.app) as client:
+        response = client.get("/api/health/ready")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "warming_up"}
@@ -0,0 +1,42 @@
+def search(client, **params):
+    response = client.get("/api/tasks/search", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_title_matches_rank_above_description_matches(client):
+    client.post("/api/tasks", json={"title": "Write report", "description": "Quarterly invoice numbers"})
+    client.post("/api/tasks", json={"title": "Send invoice", "description": "To the client"})
+    client.post("/api/tasks", json={"title": "Unrelated", "description": "Nothing here"})
+
+    items = search(client, q="Invoice")["items"]
+
+    assert [task["title"] for task in items] == ["Send invoice", "Write report"]
+    assert items[0]["score"] > items[1]["score"]
+
+
+def test_filters_and_edits_are_reflected(client):
+    project = client.post("/api/projects", json={"name": "Billing"}).json()
+    inside = client.post("/api/tasks", json={"title": "Invoice A", "project_id": project["id"]}).json()
+    client.post("/api/tasks", json={"title": "Invoice B"})
+
+    assert [t["id"] for t in search(client, q="invoice", project_id=project["id"])["items"]] == [inside["id"]]
+
+    client.put(f"/api/tasks/{inside['id']}", json={"title": "Receipt A", "status": "done"})
+    assert [t["title"] for t in search(client, q="invoice")["items"]] == ["Invoice B"]
+    assert [t["title"] for t in search(client, q="receipt", status="done")["items"]] == ["Receipt A"]
+
+
+def test_pages_cover_every_match_once(client):
+    for i in range(7):
+        client.post("/api/tasks", json={"title": f"Task {i}", "description": "shared" if i % 2 else "shared shared"})
+
+    seen, cursor = [], None
+    while True:
+        page = search(client, q="shared", limit=3, **({"cursor": cursor} if cursor else {}))
+        seen += [task["id"] for task in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 7
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+import random
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from ranking import new_rank, rank_between, rebalance_ranks
+
+
+def test_rank_between_always_leaves_room():
+    ranks = [rank_between(None, None)]
+    for _ in range(2000):
+        position = random.randrange(len(ranks) + 1)
+        before = ranks[position - 1] if position else None
+        after = ranks[position] if position < len(ranks) else None
+        rank = rank_between(before, after)
+        assert (before or "") < rank and (after is None or rank < after)
+        assert not rank.endswith("0")
+        ranks.insert(position, rank)
+
+    spaced = rebalance_ranks(len(ranks), below=new_rank())
+    assert spaced == sorted(spaced) and len(set(spaced)) == len(spaced)
+    assert spaced[0] > new_rank()
+
+
+@pytest.fixture
+def client(storage, monkeypatch):
+    monkeypatch.setattr(server, "task_cache", server.DocumentCache(max_size=0))
+    with TestClient(server.app) as client:
+        yield client
+
+
+def create_task(client, title, project_id):
+    # New-task ranks order by creation millisecond
+    time.sleep(0.002)
+    return client.post("/api/tasks", json={"title": title, "project_id": project_id}).json()["id"]
+
+
+def column(client, project_id, status):
+    tasks = client.get(f"/api/projects/{project_id}/tasks", params={"sort": "rank"}).json()
+    return [task["title"] for task in tasks if task["status"] == status]
+
+
+def test_move_rewrites_only_the_moved_task(client):
+    project_id = client.post("/api/projects", json={"name": "Board"}).json()["id"]
+    ids = {title: create_task(client, title, project_id) for title in ("a", "b", "c")}
+    # Unmoved tasks keep the old newest-first order
+    assert column(client, project_id, "todo") == ["c", "b", "a"]
+    ranks_before = {task["id"]: task["rank"] for task in client.get("/api/tasks").json()}
+
+    response = client.post(f"/api/tasks/{ids['a']}/move", json={"status": "todo", "prev_id": ids["c"], "next_id": ids["b"]})
+    assert response.status_code == 200
+    assert column(client, project_id, "todo") == ["c", "a", "b"]
+    ranks_after = {task["id"]: task["rank"] for task in client.get("/api/tasks").json()}
+    assert {task_id for task_id in ranks_before if ranks_before[task_id] != ranks_after[task_id]} == {ids["a"]}
+
+    client.post(f"/api/tasks/{ids['b']}/move", json={"status": "in_progress"})
+    assert column(client, project_id, "in_progress") == ["b"]
+    summary = client.get("/api/projects/summary").json()[0]["task_counts"]
+    assert (summary["todo"], summary["in_progress"]) == (2, 1)
+
+    stale = client.post(f"/api/tasks/{ids['c']}/move", json={"status": "todo", "prev_id": ids["b"]})
+    assert stale.status_code == 409
+
+
+def test_long_keys_trigger_a_rebalance(client, monkeypatch):
+    monkeypatch.setattr(server, "TASK_RANK_MAX_LENGTH", 16)
+    started = []
+    start = server.column_rebalances.start
+    monkeypatch.setattr(server.column_rebalances, "start", lambda *column: (started.append(column), start(*column)))
+    project_id = client.post("/api/projects", json={"name": "Board"}).json()["id"]
+    # Newest first: top, second, first, bottom
+    bottom, first, second, top = (create_task(client, title, project_id) for title in ("bottom", "first", "second", "top"))
+
+    # Keep moving whichever task is second into the gap just below top, narrowing it every time
+    for index in range(60):
+        moving, other = (first, second) if index % 2 == 0 else (second, first)
+        response = client.post(f"/api/tasks/{moving}/move", json={"status": "todo", "prev_id": top, "next_id": other})
+        assert response.status_code == 200
+
+    assert (project_id, "todo") in started
+    for _ in range(50):
+        tasks = client.get(f"/api/projects/{project_id}/tasks", params={"sort": "rank"}).json()
+        if max(len(task["rank"]) for task in tasks) <= 16:
+            break
+        time.sleep(0.02)
+    assert max(len(task["rank"]) for task in tasks) <= 16
+    titles = [task["title"] for task in tasks]
+    assert titles[0] == "top" and titles[-1] == "bottom"
+
+
+def test_rank_backfill_runs_once(backend):
+    def unranked(task_id):
+        created_at = datetime(2024, 1, 1)
+        return {"id": task_id, "title": task_id, "status": "todo", "priority": "medium", "project_id": "p1",
+                "created_at": created_at, "updated_at": created_at}
+
+    asyncio.run(backend.insert_task(unranked("old")))
+    assert asyncio.run(backend.backfill_task_ranks(server.rank_of)) == 1
+    assert asyncio.run(backend.get_task("old"))["rank"]
+
+    # Completion is recorded: a later leader skips the scan altogether
+    asyncio.run(backend.insert_task(unranked("stray")))
+    assert asyncio.run(backend.backfill_task_ranks(server.rank_of)) == 0
+    assert "rank" not in asyncio.run(backend.get_task("stray"))